@@ -78,6 +78,7 @@ from models import user
 from models import query
 from models import linkedin_profile
 from models import user_linkedin_profile
+from models import analysis_run
 config = context.config
 fileConfig(config.config_file_name)
 target_metadata = Base.metadata
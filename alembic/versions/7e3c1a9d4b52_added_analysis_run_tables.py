@@ -0,0 +1,46 @@
+"""Added analysis_run and analysis_run_event tables
+
+Revision ID: 7e3c1a9d4b52
+Revises: 11795bd2dd53
+Create Date: 2026-10-19 17:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3c1a9d4b52'
+down_revision: Union[str, Sequence[str], None] = '11795bd2dd53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_run',
+    sa.Column('run_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(length=32), server_default='running', nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('run_id')
+    )
+    op.create_index('idx_analysis_run_user_id', 'analysis_run', ['user_id'], unique=False)
+    op.create_table('analysis_run_event',
+    sa.Column('run_id', sa.UUID(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['run_id'], ['analysis_run.run_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'event_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('analysis_run_event')
+    op.drop_index('idx_analysis_run_user_id', table_name='analysis_run')
+    op.drop_table('analysis_run')
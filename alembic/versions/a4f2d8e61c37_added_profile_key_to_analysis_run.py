@@ -0,0 +1,30 @@
+"""Added profile_key to analysis_run
+
+Revision ID: a4f2d8e61c37
+Revises: 7e3c1a9d4b52
+Create Date: 2026-10-19 17:48:30.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f2d8e61c37'
+down_revision: Union[str, Sequence[str], None] = '7e3c1a9d4b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_run', sa.Column('profile_key', sa.String(length=64), nullable=True))
+    op.create_index('idx_analysis_run_user_profile_key', 'analysis_run', ['user_id', 'profile_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_run_user_profile_key', table_name='analysis_run')
+    op.drop_column('analysis_run', 'profile_key')
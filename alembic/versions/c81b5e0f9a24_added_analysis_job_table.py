@@ -0,0 +1,49 @@
+"""Added analysis_job table
+
+Revision ID: c81b5e0f9a24
+Revises: a4f2d8e61c37
+Create Date: 2026-10-19 18:20:41.337602
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81b5e0f9a24'
+down_revision: Union[str, Sequence[str], None] = 'a4f2d8e61c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_job',
+    sa.Column('job_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('profile_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('options', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('status', sa.String(length=32), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False),
+    sa.Column('available_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('lease_until', sa.TIMESTAMP(), nullable=True),
+    sa.Column('worker_id', sa.String(length=128), nullable=True),
+    sa.Column('run_id', sa.UUID(), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('idx_analysis_job_user_id', 'analysis_job', ['user_id'], unique=False)
+    op.create_index('idx_analysis_job_claim', 'analysis_job', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_job_claim', table_name='analysis_job')
+    op.drop_index('idx_analysis_job_user_id', table_name='analysis_job')
+    op.drop_table('analysis_job')
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
-from database import get_db
-from supabaseclient import supabase_public 
+from database import AsyncSessionLocal
+from utils.getuser import get_current_user_id
 from models.user import User
 from models.query import UserQuery
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
 from logger import get_logger
 from services.llm import call_llm
 from pydantic import BaseModel
@@ -21,34 +20,32 @@ class LLMResponse(BaseModel):
         extra = "allow"  # Allow additional fields
 
 @router.post("/query")  # POST since you receive JSON body
-async def ask_me(request: Request, db: AsyncSession = Depends(get_db)):
+async def ask_me(request: Request, user_id: str = Depends(get_current_user_id)):
 
-    auth_head = request.headers.get("Authorization")
-    token = auth_head.split(" ")[1]
-
-    res = supabase_public.auth.get_user(token)
-
-    user_id = res.user.id
-
-    data = await request.json()
+    # Parsed once by AskPathMiddleware
+    data = getattr(request.state, "json_body", None)
+    if data is None:
+        data = await request.json()
 
     id = data.get("id")
 
 
-    # Query user query count once
-    stmt = select(UserQuery).where(UserQuery.id == id)
-    result = await db.execute(stmt)
-    user_query = result.scalar_one_or_none()
+    # Sessions only wrap the queries, no connection is held while the LLM answers
+    async with AsyncSessionLocal() as db:
+        # Query user query count once
+        stmt = select(UserQuery).where(UserQuery.id == id)
+        result = await db.execute(stmt)
+        user_query = result.scalar_one_or_none()
 
-    # If not exists, create new UserQuery with count=1 and commit
-    if not user_query:
-        user_query = UserQuery(id=id, count=1)
-        db.add(user_query)
-        await db.commit()
-        await db.refresh(user_query)
-    else:
-        if user_query.count >= 20:
-            return {"Message": "Your limit reached max subscribe to our plan for more queries"}
+        # If not exists, create new UserQuery with count=1 and commit
+        if not user_query:
+            user_query = UserQuery(id=id, count=1)
+            db.add(user_query)
+            await db.commit()
+        else:
+            if user_query.count >= 20:
+                return {"Message": "Your limit reached max subscribe to our plan for more queries"}
+            await db.commit()
 
     question = data.get("question")
     if not question:
@@ -64,10 +61,14 @@ async def ask_me(request: Request, db: AsyncSession = Depends(get_db)):
         )
 
         # Increment count after successful API call
-        user_query.count += 1
-        your_cuurent_count = user_query.count
-        await db.commit()
-        await db.refresh(user_query)
+        async with AsyncSessionLocal() as db:
+            your_cuurent_count = await db.scalar(
+                update(UserQuery)
+                .where(UserQuery.id == id)
+                .values(count=UserQuery.count + 1)
+                .returning(UserQuery.count)
+            )
+            await db.commit()
 
         return {
             "Answer": parsed_content,
@@ -1,12 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException
 from schemas.user import SignUpData
 from schemas.user import LoginData
 from models.user import User
 from sqlalchemy import select
-from database import get_db
+from database import AsyncSessionLocal
 from pydantic import BaseModel,EmailStr
-from supabaseclient import supabase
+from services import auth_gateway
 from logger import get_logger
 
 logger = get_logger("auth router")
@@ -19,18 +18,19 @@ router = APIRouter()
 
 
 @router.post("/signup")
-async def signup(data: SignUpData, db: AsyncSession = Depends(get_db)):
+async def signup(data: SignUpData):
     logger.info("Enter into signup end point")
-    # Check if user already exists
-    query = select(User).where(User.email == data.email)
-    result = await db.execute(query)
-    existing_user = result.scalar_one_or_none()
+    # Check if user already exists, the connection is released before calling Supabase
+    async with AsyncSessionLocal() as db:
+        query = select(User).where(User.email == data.email)
+        result = await db.execute(query)
+        existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists, try logging in directly")
 
     try:
         # Create user in Supabase with metadata
-        res = supabase.auth.sign_up({
+        res = await auth_gateway.sign_up({
             "email": data.email,
             "password": data.password
             })
@@ -44,13 +44,14 @@ async def signup(data: SignUpData, db: AsyncSession = Depends(get_db)):
             email=data.email,
             age=data.age
         )
-        db.add(user)
-        
-        await db.commit()
-        logger.info("User has been been added")
+        async with AsyncSessionLocal() as db:
+            db.add(user)
+            
+            await db.commit()
+            logger.info("User has been been added")
 
-        await db.refresh(user)
-        logger.info("User has been been refreshed")
+            await db.refresh(user)
+            logger.info("User has been been refreshed")
 
         return {"message": "User created successfully", "user": user}
 
@@ -60,18 +61,19 @@ async def signup(data: SignUpData, db: AsyncSession = Depends(get_db)):
 
     
 @router.post("/login")
-async def login(data: LoginData, db: AsyncSession = Depends(get_db)):
+async def login(data: LoginData):
     logger.info("Enter into login end point")
     # Check if user exists
-    query = select(User).where(User.email == data.email)
-    result = await db.execute(query)
-    result = result.scalar_one_or_none()
+    async with AsyncSessionLocal() as db:
+        query = select(User).where(User.email == data.email)
+        result = await db.execute(query)
+        result = result.scalar_one_or_none()
     if result is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     try:
         # Authenticate user call supabase auth sign_in API
-        res = supabase.auth.sign_in_with_password(
+        res = await auth_gateway.sign_in_with_password(
             {
                 "email": data.email,
                 "password": data.password
@@ -3,296 +3,81 @@ import json
 import asyncio
 import re
 from datetime import datetime
+from functools import partial
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import Dict, Any, List, AsyncGenerator
+from typing import Dict, Any, List, AsyncGenerator, Optional
 from models.user_linkedin_profile import UserLinkedInProfile
 from models.user import User
 from models.linkedin_profile import LinkedInProfile
-from database import get_db
-
-
-from utils.scorer.linkedin_score import get_profile_score
-from utils.scorer.linkedin_score import get_headline_score
-from utils.scorer.linkedin_score import get_about_score
-from utils.scorer.linkedin_score import get_profile_content_score
-from utils.scorer.linkedin_score import get_experience_score
-from utils.scorer.linkedin_score import get_education_score
-from utils.scorer.linkedin_score import get_project_score
-from utils.scorer.linkedin_score import get_skill_score
-from utils.scorer.linkedin_score import get_certification_score
-from utils.scorer.linkedin_score import get_volunteer_section_score
-from utils.scorer.linkedin_score import get_interest_section_score
-from utils.scorer.linkedin_score import get_language_score
-from utils.scorer.linkedin_score import get_profile_content_score
-from utils.scorer.linkedin_score import get_banner_score
-from utils.scorer.linkedin_score import get_linkedin_url_score
-from utils.scorer.linkedin_score import get_recommendation_score
-from utils.scorer.linkedin_score import get_activity_score
-from utils.linkedin_format.linkedin_format import get_headline_format
-from utils.linkedin_format.linkedin_format import get_about_format
-from utils.linkedin_format.linkedin_format import get_experience_format
-from utils.linkedin_format.linkedin_format import get_education_format
-from utils.linkedin_format.linkedin_format import get_project_format
-from utils.linkedin_format.linkedin_format import get_skill_format
-from utils.linkedin_format.linkedin_format import get_certification_format
-from utils.linkedin_format.linkedin_format import get_volunteer_format
-from utils.linkedin_format.linkedin_format import get_interest_format
-from utils.linkedin_format.linkedin_format import get_language_format
-from utils.linkedin_format.linkedin_format import get_banner_format
-from utils.linkedin_format.linkedin_format import get_profile_format
-from utils.linkedin_format.linkedin_format import get_linkedin_url_format
-from utils.linkedin_format.linkedin_format import get_recommendation_format
-from utils.linkedin_format.linkedin_format import get_profile_content_format
-from utils.linkedin_format.linkedin_format import get_activity_format
+from database import get_db, AsyncSessionLocal
 
 
+from utils.scorer.sections import SECTIONS_CONFIG, build_report, get_sections_subset
+from services.report_writer import report_writer
+from services.request_timing import timed, get_request_timing, create_background_task
+from services.metrics import count_stream
+from services.job_queue import submit_job, get_job, job_to_dict, JOB_POLL_SECONDS
+from services.analysis_runs import attach_or_start_run, get_profile_key, stream_run, run_exists, parse_event_id, format_event_id
+from services.live_scoring import LiveScoringSession
+from services.profile_analysis import run_profile_analysis, get_provisional_results, get_stored_report_for_merge, finish_sections_run
+from services.quick_score import quick_score
+from services.ranking import rank_top_k
+from services.section_cache import section_cache
+from services.section_scheduler import SectionsRun, run_sections
+from logger import get_logger
+
+
+logger = get_logger("LinkedIn checker router")
 
 router = APIRouter()
 
-async def process_sections_streaming(data: Dict[str, Any], user_id: UUID, db: AsyncSession) -> AsyncGenerator[str, None]:
+# Runs that missed their deadline and are finishing in the background, referenced so they are not garbage collected
+_background_tasks = set()
+
+
+def _get_deadline(deadline_ms: Optional[int]):
     """
-    Process LinkedIn profile sections and stream results as they complete
+    Loop time at which a best effort analysis has to answer, None without a budget
     """
+    if deadline_ms is None:
+        return None
+    if deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="deadline_ms must be positive")
+    return asyncio.get_running_loop().time() + deadline_ms / 1000
+
+
+def _get_requested_sections(sections: Optional[str]):
+    """
+    Configs of a comma separated list of section names, None to score every section
+    """
+    if not sections:
+        return None
+    names = [name.strip() for name in sections.split(",") if name.strip()]
+    if not names:
+        return None
     try:
-        # Initialize total score
-        total_score = 0
-        completed_sections = []
-        
-        # Define section processing order and metadata
-        sections_config = [
-            {
-                "name": "profile_content",
-                "scorer": get_profile_content_score,
-                "formatter": get_profile_content_format,
-                "display_name": "Profile Content"
-            },
-            {
-                "name": "profile_pic",
-                "scorer": get_profile_score,
-                "formatter": get_profile_format,
-                "display_name": "Profile Picture"
-            },
-            {
-                "name": "banner",
-                "scorer": get_banner_score,
-                "formatter": get_banner_format,
-                "display_name": "Banner"
-            },
-            {
-                "name": "headline", 
-                "scorer": get_headline_score,
-                "formatter": get_headline_format,
-                "display_name": "Headline"
-            },
-            {
-                "name": "about",
-                "scorer": get_about_score,
-                "formatter": get_about_format,
-                "display_name": "About Section"
-            },
-            {
-                "name": "experience",
-                "scorer": get_experience_score,
-                "formatter": get_experience_format,
-                "display_name": "Experience"
-            },
-            {
-                "name": "education",
-                "scorer": get_education_score,
-                "formatter": get_education_format,
-                "display_name": "Education"
-            },
-            {
-                "name": "projects",
-                "scorer": get_project_score,
-                "formatter": get_project_format,
-                "display_name": "Projects"
-            },
-            {
-                "name": "skills",
-                "scorer": get_skill_score,
-                "formatter": get_skill_format,
-                "display_name": "Skills"
-            },
-            {
-                "name": "certifications",
-                "scorer": get_certification_score,
-                "formatter": get_certification_format,
-                "display_name": "Certifications"
-            },
-            {
-                "name": "volunteering",
-                "scorer": get_volunteer_section_score,
-                "formatter": get_volunteer_format,
-                "display_name": "Volunteering"
-            },
-            {
-                "name": "interests",
-                "scorer": get_interest_section_score,
-                "formatter": get_interest_format,
-                "display_name": "Interests"
-            },
-            {
-                "name": "languages",
-                "scorer": get_language_score,
-                "formatter": get_language_format,
-                "display_name": "Languages"
-            },
-            {
-                "name": "linkedin_url",
-                "scorer": get_linkedin_url_score,
-                "formatter": get_linkedin_url_format,
-                "display_name": "LinkedIn URL"
-            },
-            {
-                "name": "recommendations",
-                "scorer": get_recommendation_score,
-                "formatter": get_recommendation_format,
-                "display_name": "Recommendations"
-            },
-            {
-                "name": "activity",
-                "scorer": get_activity_score,
-                "formatter": get_activity_format,
-                "display_name": "Activity"
-            }
-        ]
-        
-        # Send initial response
-       
+        return get_sections_subset(names)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
 
-        # Process each section
-        for section_config in sections_config:
-            try:
-                # Get score
-                score_result = await section_config["scorer"](data)
-                
-                # Format result
-                formatted_result = section_config["formatter"](score_result)
-                
-                # Update total score
-                sections_to_include_in_total = ["profile_pic","profile_content", "headline", "about","experience", "education", "skills", "linkedin_url"]
-                if section_config["name"] in sections_to_include_in_total:
-                    section_score = score_result.get("score", 0)
-                    total_score += section_score
-                
-                # Add to completed sections
-                completed_sections.append(formatted_result)
-
-                stream = round(total_score)
-                
-                # Send section result
-                section_response = {
-                    "message_type" : "section_analysis",
-                    "score": stream,
-                    "sections": [formatted_result]
-                }
-                
-                yield f"data: {json.dumps(section_response)}\n\n"
-                
-                
-            except Exception as e:
-                # Send error for this section
-                error_response = {
-                    "message_type": "error",
-                    "section_name": section_config["name"],
-                    "display_name": section_config["display_name"],
-                    "error": str(e),
-                    "total_score": total_score,
-                    "progress": len(completed_sections),
-                    "total_sections": len(sections_config),
-                    "message": "Analysis failed"
-                }
-                yield f"data: {json.dumps(error_response)}\n\n"
-        
-        # Send final response
-        final_response = {
-            "message_type": "complete_analysis",
-            "score": round(total_score),
-            "sections": completed_sections
-        }
-        
-        # Store in database
-        try:
-            # Get LinkedIn URL from data if available
-            linkedin_url = data.get("profile", {}).get("linkedin_url", "")
-            
-            # Check if user already has a record in user_linkedin_profile table
-            user_profile_query = select(UserLinkedInProfile).where(UserLinkedInProfile.user_id == user_id)
-            existing_user_profile = await db.scalar(user_profile_query)
-            
-            if existing_user_profile:
-                # User is doing analysis for the second time
-                # Update the linkedin_profile table
-                linkedin_profile_query = select(LinkedInProfile).where(LinkedInProfile.profile_url == existing_user_profile.linkedin_profile_url)
-                existing_linkedin_profile = await db.scalar(linkedin_profile_query)
-                
-                if existing_linkedin_profile:
-                    # Update existing linkedin_profile record
-                    existing_linkedin_profile.profile_data = data
-                    existing_linkedin_profile.profile_report_data = final_response
-                    
-                    # Update profile_url if it has changed
-                    if linkedin_url and linkedin_url != existing_linkedin_profile.profile_url:
-                        existing_linkedin_profile.profile_url = linkedin_url
-                        # Update the user_linkedin_profile table with new URL
-                        existing_user_profile.linkedin_profile_url = linkedin_url
-                else:
-                    
-                    new_linkedin_profile = LinkedInProfile(
-                        profile_url=linkedin_url,
-                        profile_data=data,
-                        profile_report_data=final_response
-                    )
-                    db.add(new_linkedin_profile)
-                    
-                    # Update user_linkedin_profile with new URL
-                    existing_user_profile.linkedin_profile_url = linkedin_url
-            else:
-                
-                # Check if linkedin_profile already exists with this URL
-                linkedin_profile_query = select(LinkedInProfile).where(LinkedInProfile.profile_url == linkedin_url)
-                existing_linkedin_profile = await db.scalar(linkedin_profile_query)
-                
-                if existing_linkedin_profile:
-                    # Update existing linkedin_profile record
-                    existing_linkedin_profile.profile_data = data
-                    existing_linkedin_profile.profile_report_data = final_response
-                else:
-                    # Create new linkedin_profile record
-                    new_linkedin_profile = LinkedInProfile(
-                        profile_url=linkedin_url,
-                        profile_data=data,
-                        profile_report_data=final_response
-                    )
-                    db.add(new_linkedin_profile)
-                
-                # Create new user_linkedin_profile record
-                new_user_profile = UserLinkedInProfile(
-                    user_id=user_id,
-                    linkedin_profile_url=linkedin_url
-                )
-                db.add(new_user_profile)
-            
-            await db.commit()
-           
-            
-                
-        except Exception as e:
-            # Log error but don't fail the response
-            print(f"Error saving to database: {e}")
-            await db.rollback()
-        
-        yield f"data: {json.dumps(final_response)}\n\n"
-        
 
+def _finish_in_background(run: SectionsRun, data: Dict[str, Any], user_id: Optional[UUID] = None, stored_report: Optional[Dict[str, Any]] = None):
+    task = create_background_task(finish_sections_run(run, data, user_id, stored_report))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
+async def _stream_run_events(run_id: UUID, last_event_id: int = 0) -> AsyncGenerator[str, None]:
+    """
+    Server-Sent Events of a run, ids let a client resume with Last-Event-ID
+    """
+    try:
+        async for event_id, event in stream_run(run_id, last_event_id):
+            yield f"id: {format_event_id(run_id, event_id)}\ndata: {json.dumps(event)}\n\n"
     except Exception as e:
-        # Send error response
         error_response = {
             "message_type": "error",
             "error": str(e),
@@ -300,51 +85,204 @@ async def process_sections_streaming(data: Dict[str, Any], user_id: UUID, db: As
         }
         yield f"data: {json.dumps(error_response)}\n\n"
 
+    timing = get_request_timing()
+    if timing is not None:
+        # The headers went out before the analysis ran, so its stages come as a last event without an id
+        timing_response = {
+            "message_type": "server_timing",
+            "server_timing": timing.header_value(),
+            "timing": timing.to_dict()
+        }
+        yield f"data: {json.dumps(timing_response)}\n\n"
+
+
+def _event_stream_response(run_id: UUID, last_event_id: int = 0):
+    return StreamingResponse(
+        count_stream(_stream_run_events(run_id, last_event_id)),
+        media_type="text/plain",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream",
+            "X-Analysis-Run-Id": str(run_id)
+        }
+    )
+
+
 @router.post("/user/{user_id}/linkedin-checker/profile/stream")
-async def check_linkedin_profile_stream(user_id: UUID, data: Dict[str, Any], db: AsyncSession = Depends(get_db)):
+async def check_linkedin_profile_stream(user_id: UUID, data: Dict[str, Any], deadline_ms: Optional[int] = None, sections: Optional[str] = None, last_event_id: Optional[str] = Header(None)):
     """
     Stream LinkedIn profile analysis results as they complete
     
     Args:
         data: LinkedIn profile data in JSON format containing profile sections
+        deadline_ms: Optional time budget, unfinished sections are returned as provisional
+            rule based results and the complete report is stored once it is ready
+        sections: Optional comma separated section names, only those are scored and merged
+            into the stored report, every section is scored when there is none
+        Last-Event-ID: Header sent on reconnect, the stream resumes the run after that event
+            instead of starting a new analysis
+    
+    A request for the same profile and options while an analysis of the user is still
+    running subscribes to that analysis instead of starting another one.
     
     Returns:
         Server-Sent Events stream containing:
+            - analysis_started with the run id
             - Individual section results as they complete
             - Progress updates
             - Final complete result
     """
+    deadline = _get_deadline(deadline_ms)
+    requested_sections = _get_requested_sections(sections)
     try:
+        resume = parse_event_id(last_event_id)
+        if resume is not None and await run_exists(resume[0], user_id):
+            logger.info("Resuming analysis run %s for user %s after event %d", resume[0], user_id, resume[1])
+            return _event_stream_response(resume[0], resume[1])
+
         # Validate input data
         if not data:
             raise HTTPException(status_code=400, detail="Profile data is required")
-        
-        return StreamingResponse(
-            process_sections_streaming(data, user_id, db),
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Content-Type": "text/event-stream"
-            }
+
+        # A second tab or a quick retry for the same profile follows the analysis already running
+        profile_key = get_profile_key(data, deadline_ms=deadline_ms, sections=[section_config["name"] for section_config in requested_sections or []])
+        run_id, attached = await attach_or_start_run(
+            user_id,
+            profile_key,
+            partial(run_profile_analysis, data=data, user_id=user_id, deadline=deadline, requested_sections=requested_sections)
         )
+        return _event_stream_response(run_id)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/user/{user_id}/linkedin-checker/runs/{run_id}/stream")
+async def resume_linkedin_profile_stream(user_id: UUID, run_id: UUID, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream an analysis run from the start, or after the event in the Last-Event-ID header.
+    Finished sections are replayed from storage, a running analysis is followed live.
+    """
+    if not await run_exists(run_id, user_id):
+        raise HTTPException(status_code=404, detail="Analysis run not found")
+
+    resume = parse_event_id(last_event_id)
+    after_event_id = resume[1] if resume is not None and resume[0] == run_id else 0
+    return _event_stream_response(run_id, after_event_id)
+
+@router.post("/user/{user_id}/linkedin-checker/jobs", status_code=202)
+async def submit_linkedin_profile_job(user_id: UUID, data: Dict[str, Any], sections: Optional[str] = None):
+    """
+    Queue a LinkedIn profile analysis and return its job id without waiting for it
+    
+    Args:
+        data: LinkedIn profile data in JSON format containing profile sections
+        sections: Optional comma separated section names, same as the stream endpoint
+    
+    Returns:
+        Dict containing the job id, poll /jobs/{job_id} or stream /jobs/{job_id}/stream
+    """
+    if not data:
+        raise HTTPException(status_code=400, detail="Profile data is required")
+    requested_sections = _get_requested_sections(sections)
+
+    try:
+        options = {"sections": [section_config["name"] for section_config in requested_sections]} if requested_sections else {}
+        job_id = await submit_job(user_id, data, options)
+        return {"job_id": str(job_id), "status": "queued"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/user/{user_id}/linkedin-checker/jobs/{job_id}")
+async def get_linkedin_profile_job(user_id: UUID, job_id: UUID):
+    """
+    Status of an analysis job, with the report once it is complete
+    """
+    try:
+        job = await get_job(job_id, user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job_to_dict(job)
+
+
+async def _stream_job_events(job_id: UUID, user_id: UUID, last_event_id: Optional[str]) -> AsyncGenerator[str, None]:
+    """
+    Wait for a worker to start the job, then stream its analysis run
+    """
+    while True:
+        try:
+            job = await get_job(job_id, user_id)
+        except Exception as e:
+            yield f"data: {json.dumps({'message_type': 'error', 'error': str(e), 'message': 'Analysis failed'})}\n\n"
+            return
+
+        if job is None:
+            # Deleted while the client was waiting
+            yield f"data: {json.dumps({'message_type': 'error', 'error': 'Analysis job not found', 'message': 'Analysis failed'})}\n\n"
+            return
+
+        if job.run_id is not None:
+            resume = parse_event_id(last_event_id)
+            after_event_id = resume[1] if resume is not None and resume[0] == job.run_id else 0
+            async for chunk in _stream_run_events(job.run_id, after_event_id):
+                yield chunk
+            return
+
+        if job.status in ("complete", "dead"):
+            yield f"data: {json.dumps({'message_type': 'job_' + job.status, 'job': job_to_dict(job)})}\n\n"
+            return
+
+        # SSE comment, keeps the connection open while the job is queued
+        yield ": queued\n\n"
+        await asyncio.sleep(JOB_POLL_SECONDS)
+
+
+@router.get("/user/{user_id}/linkedin-checker/jobs/{job_id}/stream")
+async def stream_linkedin_profile_job(user_id: UUID, job_id: UUID, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream the analysis of a job as Server-Sent Events, the same events as the stream endpoint
+    """
+    try:
+        job = await get_job(job_id, user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    return StreamingResponse(
+        count_stream(_stream_job_events(job_id, user_id, last_event_id)),
+        media_type="text/plain",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream"
+        }
+    )
+
+
 @router.post("/linkedin-checker/profile")
-async def check_linkedin_profile(data: Dict[str, Any]):
+async def check_linkedin_profile(data: Dict[str, Any], deadline_ms: Optional[int] = None, sections: Optional[str] = None):
     """
     Analyze and score a LinkedIn profile with AI-powered suggestions
     
     Args:
         data: LinkedIn profile data in JSON format containing profile sections
+        deadline_ms: Optional time budget, unfinished sections are returned as provisional
+            rule based results
+        sections: Optional comma separated section names, only those are scored and merged
+            into the report stored for the profile URL, every section is scored when there is none
     
     Returns:
         Dict containing:
             - score_data: Overall profile score
             - sections: Detailed analysis and suggestions for each section
     """
+    deadline = _get_deadline(deadline_ms)
+    requested_sections = _get_requested_sections(sections)
     try:
         # Initialize analyzers
       
@@ -354,51 +292,42 @@ async def check_linkedin_profile(data: Dict[str, Any]):
             raise HTTPException(status_code=400, detail="Profile data is required")
 
         
-        profile_data = data.get('profile', {})
-
-
-        headline_result =  await get_headline_score(profile_data.get('headline', ''))
-        profile_content_result = await get_profile_content_score(data)
-        about_result =  await get_about_score(data)
-        experience_result = await get_experience_score(data)
-        education_result = await get_education_score(data)
-        project_result = await get_project_score(data)
-        skill_result = await get_skill_score(data)
-        certification_result = await get_certification_score(data)
-        volunteer_result = await get_volunteer_section_score(data)
-        interest_result = await get_interest_section_score(data)
-        language_result = await get_language_score(data)
-        profilePic_result = await get_profile_score(data)
-        banner_result = await get_banner_score(data)
-        linkedin_url_result = await get_linkedin_url_score(data)
-        recommendation_result = await get_recommendation_score(data)
-        activity_result = await get_activity_score(data)
-          
-        profile_content_format_result = get_profile_content_format(profile_content_result)
-        headline_format_result = get_headline_format(headline_result)
-        about_format_result = get_about_format(about_result)
-        experience_format_result = get_experience_format(experience_result)
-        education_format_result = get_education_format(education_result)
-        project_format_result = get_project_format(project_result)
-        skill_format_result = get_skill_format(skill_result)
-        certification_format_result = get_certification_format(certification_result)
-        volunteer_format_result = get_volunteer_format(volunteer_result)
-        interest_format_result = get_interest_format(interest_result)
-        language_format_result = get_language_format(language_result)
-        banner_format_result = get_banner_format(banner_result)
-        profile_format_result = get_profile_format(profilePic_result)
-        linkedin_url_format_result = get_linkedin_url_format(linkedin_url_result)
-        recommendation_format_result = get_recommendation_format(recommendation_result)
-        activity_format_result = get_activity_format(activity_result)
+        section_configs = {section_config["name"]: section_config for section_config in SECTIONS_CONFIG}
+        section_order = ["profile_content", "headline", "about", "experience", "education", "projects", "skills", "certifications", "volunteering", "interests", "languages", "banner", "profile_pic", "linkedin_url", "recommendations", "activity"]
 
-        
-        sections = [profile_content_format_result,headline_format_result, about_format_result, experience_format_result, education_format_result, project_format_result, skill_format_result, certification_format_result, volunteer_format_result, interest_format_result, language_format_result, banner_format_result, profile_format_result, linkedin_url_format_result, recommendation_format_result, activity_format_result]
+        sections_config = SECTIONS_CONFIG
+        stored_report = None
+        if requested_sections is not None:
+            linkedin_url = data.get("profile", {}).get("linkedin_url", "")
+            # Its own session, the connection goes back to the pool before the scorers run
+            async with AsyncSessionLocal() as db:
+                stored_report = await get_stored_report_for_merge(db, linkedin_url=linkedin_url)
+            if stored_report is not None:
+                sections_config = requested_sections
+
+        run = SectionsRun(data, sections_config)
+        try:
+            async for _ in run.nodes(deadline):
+                pass
+            if run.errors:
+                raise Exception("; ".join(f"{name}: {error}" for name, error in run.errors.items()))
+            results = run.results
+            if not run.finished:
+                results = await get_provisional_results(run, data, sections_config)
+                # Nothing is stored for this endpoint, finishing the run fills the section cache for a retry
+                _finish_in_background(run, data)
+        except BaseException:
+            run.cancel()
+            raise
+        logger.info("Section timings: %s", run.timings)
+
+        with timed("format"):
+            report = build_report(results, [section_configs[name] for name in section_order], stored_report)
 
-        scores = [profile_content_result,headline_result, about_result, experience_result, education_result, project_result, skill_result, certification_result, volunteer_result, interest_result, language_result, profilePic_result, banner_result, linkedin_url_result, recommendation_result, activity_result]
         result = 0
-        for score in scores:
-            result += score.get("score",0)
-            print(f"score: {score.get('score',0)}")
+        for score in report["section_scores"].values():
+            result += score
+            logger.debug("score: %s", score)
 
         # return {
         #     "profile_content_result" : profile_content_result,  
@@ -418,21 +347,142 @@ async def check_linkedin_profile(data: Dict[str, Any]):
         #     "linkedin_url_result" : linkedin_url_format_result
         # }
 
-        return {
+        response = {
             "score" : result,
-            "sections" : sections
+            "sections" : report["sections"]
         }
+        if report.get("provisional"):
+            response["provisional"] = True
+        return response
+
+
+
+
+    except Exception as e:
+        raise HTTPException(status_code = 500, detail = str(e))
+
+
+@router.post("/linkedin-checker/profile/quick")
+async def quick_score_linkedin_profile(data: Dict[str, Any]):
+    """
+    Score a LinkedIn profile with the rule based checks only, without calling the LLM
+    
+    Args:
+        data: LinkedIn profile data in JSON format containing profile sections
+    
+    Returns:
+        Dict containing:
+            - score: Total of the rule based checks
+            - sections: Same format as the full analysis, LLM checks are marked pending
+    """
+    if not data:
+        raise HTTPException(status_code=400, detail="Profile data is required")
+
+    try:
+        return await quick_score(data)
+    except Exception as e:
+        raise HTTPException(status_code = 500, detail = str(e))
+
+
+@router.websocket("/user/{user_id}/linkedin-checker/live")
+async def live_linkedin_profile(websocket: WebSocket, user_id: UUID, debounce_ms: int = 800):
+    """
+    Score a profile while it is being edited
+    
+    Client messages:
+        {"type": "profile", "profile": {...}}  replace the whole profile
+        {"type": "patch", "patch": {...}}      JSON merge patch of the profile, e.g. {"about": {"text": "..."}}
+    
+    Server messages:
+        section_delta messages with the sections whose input changed and the new total.
+        Rule checks are sent on every patch, LLM checks once the section has not changed
+        for debounce_ms, a newer patch cancels LLM work still running for older text.
+    """
+    await websocket.accept()
+    session = LiveScoringSession(websocket.send_json, debounce_ms=max(debounce_ms, 0))
+    logger.info("Live scoring session opened for user %s", user_id)
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError as e:
+                # JSONDecodeError, the frame is consumed and the session goes on
+                await session.send({"message_type": "error", "error": str(e), "message": "Invalid JSON"})
+                continue
+            message_type = message.get("type") if isinstance(message, dict) else None
+            if message_type == "profile" and isinstance(message.get("profile"), dict):
+                await session.apply(message["profile"], replace=True)
+            elif message_type == "patch" and isinstance(message.get("patch"), dict):
+                await session.apply(message["patch"])
+            else:
+                await session.send({
+                    "message_type": "error",
+                    "error": "Expected {\"type\": \"profile\", \"profile\": {...}} or {\"type\": \"patch\", \"patch\": {...}}",
+                    "message": "Invalid message"
+                })
+    except WebSocketDisconnect:
+        logger.info("Live scoring session closed for user %s", user_id)
+    except Exception as e:
+        logger.error("Live scoring session for user %s failed: %s", user_id, e)
+    finally:
+        session.close()
 
 
+@router.post("/linkedin-checker/rank")
+async def rank_linkedin_profiles(data: Dict[str, Any]):
+    """
+    Rank LinkedIn profiles and return the top k by total score
+    
+    Args:
+        data: {"k": 20, "profiles": [profile, ...]} with profiles in the same format as /linkedin-checker/profile
+    
+    Returns:
+        Dict containing:
+            - top: best k profiles with their score and per section scores
+            - pruned: profiles whose LLM sections were skipped
+            - llm_calls_avoided: LLM calls saved by pruning
+    """
+    profiles = data.get("profiles") if data else None
+    if not profiles:
+        raise HTTPException(status_code=400, detail="profiles field is required")
 
+    try:
+        k = int(data.get("k", 20))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="k must be an integer")
+    if k <= 0:
+        raise HTTPException(status_code=400, detail="k must be positive")
 
+    try:
+        return await rank_top_k(profiles, k)
     except Exception as e:
         raise HTTPException(status_code = 500, detail = str(e))
 
 
+@router.get("/linkedin-checker/cache/stats")
+async def get_section_cache_stats():
+    """
+    Hit rate and size of the per-process section result cache
+    """
+    return section_cache.stats()
+
+
+@router.get("/linkedin-checker/report-writer/stats")
+async def get_report_writer_stats():
+    """
+    Queue size, batches and write latency of the write-behind report store
+    """
+    return report_writer.stats()
+
+
 @router.get("/user/{user_id}/linkedin-checker/profile")
 async def get_linkedin_profile(user_id: UUID, db: AsyncSession = Depends(get_db)):
     try:
+        # Report of an analysis that finished but is not written yet
+        pending_report = report_writer.get_pending_report(user_id=user_id)
+        if pending_report is not None:
+            return {"status": "success", "data": pending_report}
+
         # Get user's linkedin profile record
         user_profile_query = select(UserLinkedInProfile).where(UserLinkedInProfile.user_id == user_id)
         user_profile = await db.scalar(user_profile_query)
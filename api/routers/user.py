@@ -5,8 +5,8 @@ from models.user import User
 from schemas.user import UserOut
 from schemas.user import UserIn
 from database import get_db
-from utils.getuser import get_user_id_from_token
-from supabaseclient import supabase, get_user_client, supabase_public
+from utils.getuser import get_current_user_id, verify_token
+from services import auth_gateway
 from logger import get_logger
 
 logger = get_logger("user router")
@@ -52,43 +52,42 @@ async def update_user(
 
     logger.info("User has both access token and refresh token")
 
-    # 3️ Create authenticated Supabase client
-    supabase_user = get_user_client(access_token, refresh_token)
-    logger.info("Got the client object for the user")
-
-
-    # 4️ Verify logged-in user
-    try:
-        user_info = supabase_user.auth.get_user()
-        if not user_info.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        user_id = user_info.user.id
-        logger.info("User has been verified and got the user id")
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
-
-    # 5️ Only allow self-update
-    print(id)
-    print(user_id)
-    if id != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized to update this user")
-
-    # 6️ Prepare Supabase Auth update data
-    update_data = {}
-    if data.password:
-        update_data["password"] = data.password
-    if data.email:
-        update_data["email"] = data.email
-
-    # 7️ Update in Supabase Auth
-    try:
-        if update_data:
-            res = supabase_user.auth.update_user(update_data)
-            if not res.user:
-                raise HTTPException(status_code=400, detail="Failed to update Supabase user")
-            logger.info("User has been been updated in supabase")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Supabase update error: {str(e)}")
+    # 3️ Create authenticated Supabase client, pooled per verified user session
+    claims = await verify_token(access_token)
+    async with auth_gateway.user_client(claims, access_token, refresh_token) as supabase_user:
+        logger.info("Got the client object for the user")
+
+        # 4️ Verify logged-in user
+        try:
+            user_info = await auth_gateway.get_session_user(supabase_user)
+            if not user_info.user:
+                raise HTTPException(status_code=401, detail="Invalid or expired token")
+            user_id = user_info.user.id
+            logger.info("User has been verified and got the user id")
+        except Exception as e:
+            raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
+
+        # 5️ Only allow self-update
+        logger.debug("Update of user %s requested by %s", id, user_id)
+        if id != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized to update this user")
+
+        # 6️ Prepare Supabase Auth update data
+        update_data = {}
+        if data.password:
+            update_data["password"] = data.password
+        if data.email:
+            update_data["email"] = data.email
+
+        # 7️ Update in Supabase Auth
+        try:
+            if update_data:
+                res = await auth_gateway.update_user(supabase_user, update_data)
+                if not res.user:
+                    raise HTTPException(status_code=400, detail="Failed to update Supabase user")
+                logger.info("User has been been updated in supabase")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Supabase update error: {str(e)}")
 
     # 8️ Update local DB
     stmt = select(User).where(User.id == user_id)
@@ -132,27 +131,12 @@ async def get_users(db: AsyncSession = Depends(get_db)):
 @router.get("/id", response_model=UserOut)
 async def get_user_by_id(
     id: str, 
-    request: Request, 
+    user_id: str = Depends(get_current_user_id), 
     db: AsyncSession = Depends(get_db)
 ):
-    # Extract and validate token
-    auth_head = request.headers.get("Authorization")
-    if not auth_head or not auth_head.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    token = auth_head.split(" ")[1]
-
-
-    #user_id = get_user_id_from_token(access_token) it will use jwt decoder or else we can use in built function of supabase but it is bit slow cause we are making api request
-    #we can use supabase which will use service role key and also we can use supabase_public which will user anon key
-    
-    res = supabase_public.auth.get_user(token) 
-    if not res.user:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = res.user.id
+    # The token is verified locally (see utils/getuser.py), no request to Supabase
     
-    print(id) #ea4636af-e326-4f26-a556-631016ece2df
-    print(user_id) 
+    logger.debug("User %s requested by %s", id, user_id)
     
 
     if id != user_id:
@@ -177,11 +161,13 @@ async def delete_all_users(db: AsyncSession = Depends(get_db)):
         # Step 1: Fetch all users from your database (including Supabase auth IDs)
         users = await db.execute(select(User))  # Adjust query if needed
         user_list = users.scalars().all()
+        # End the read transaction, the connection is not held while Supabase is called
+        await db.commit()
 
         # Step 2: Delete users from Supabase Auth
         for user in user_list:
             # Supabase Auth requires admin privileges (use service role key!)
-            supabase.auth.admin.delete_user(user.id)  # Replace `supabase_id` with your column name
+            await auth_gateway.delete_user(user.id)  # Replace `supabase_id` with your column name
 
         # Step 3: Delete users from your database
         await db.execute(delete(User))
@@ -193,23 +179,9 @@ async def delete_all_users(db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     
 @router.delete("/delete_user")
-async def delete_user(id: str, request: Request, db: AsyncSession = Depends(get_db)):
-    # Extract bearer token
-    auth_head = request.headers.get("Authorization")
-    if not auth_head or not auth_head.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    token = auth_head.split(" ")[1]
-    
-    # Verify the token using anon key client
-    res = supabase_public.auth.get_user(token)
-    if not res.user:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user_id = res.user.id
+async def delete_user(id: str, user_id: str = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
 
-    print(id)
-    print(user_id)
+    logger.debug("Deletion of user %s requested by %s", id, user_id)
     # Ensure the user can only delete themselves
     if id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this user")
@@ -218,11 +190,10 @@ async def delete_user(id: str, request: Request, db: AsyncSession = Depends(get_
     stmt = delete(User).where(User.id == id)
     await db.execute(stmt)
     await db.commit()
-    print("deleted from db")
+    logger.info("User %s deleted from db", id)
     # Delete from Supabase Auth (requires service role key)
     try:
-        print("Before deletion from supabase")
-        supabase.auth.admin.delete_user(id)  # supabase must be service-role client
+        await auth_gateway.delete_user(id)  # supabase must be service-role client
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete user from Supabase: {str(e)}")
 
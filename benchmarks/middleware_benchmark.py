@@ -0,0 +1,157 @@
+"""
+Throughput of the middleware stack, BaseHTTPMiddleware against plain ASGI.
+
+    python -m benchmarks.middleware_benchmark
+    python -m benchmarks.middleware_benchmark --requests 5000 --concurrency 50
+    python -m benchmarks.middleware_benchmark --block-threshold-ms 50
+
+The same two middlewares are run as BaseHTTPMiddleware subclasses (how they
+were written before) and as the plain ASGI classes of middleware/middleware.py,
+in front of a JSON endpoint, an /ask endpoint and a streamed endpoint.
+Requests go through httpx's ASGI transport, so no server or network is involved.
+With --block-threshold-ms the loop watchdog runs alongside, and the run fails
+with the captured stacks if anything blocked the event loop for that long.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+import jwt
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import utils.getuser as getuser
+from middleware.middleware import CustomHeaderMiddleware, AskPathMiddleware
+from services.loop_monitor import LoopLagMonitor
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+class BaseHTTPCustomHeaderMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = f"{time.perf_counter() - start_time:.4f}s"
+        return response
+
+
+class BaseHTTPAskPathMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if not request.url.path.startswith("/ask"):
+            return await call_next(request)
+        user_id = (await getuser.verify_token(getuser.get_bearer_token(request)))["sub"]
+        data = await request.json()
+        if data.get("id") != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized to access this user")
+        return await call_next(request)
+
+
+def _build_app(header_middleware, ask_middleware):
+    app = FastAPI()
+    app.add_middleware(ask_middleware)
+    app.add_middleware(header_middleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"Message": "It's working well"}
+
+    @app.post("/ask/query")
+    async def ask(request: Request):
+        data = getattr(request.state, "json_body", None)
+        if data is None:
+            data = await request.json()
+        return {"id": data["id"]}
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for index in range(20):
+                yield f"data: {index}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+async def _measure(app, method, path, args, **kwargs):
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise Exception(f"{path} returned {response.status_code}: {response.text}")
+
+        await one()  # warm up
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return args.requests / elapsed, statistics.median(latencies)
+
+
+async def run(args):
+    token = jwt.encode(
+        {"sub": USER_ID, "aud": "authenticated", "exp": int(time.time()) + 3600},
+        getuser.SUPABASE_JWT_SECRET,
+        algorithm="HS256"
+    )
+    ask_kwargs = {
+        "headers": {"Authorization": f"Bearer {token}"},
+        "content": json.dumps({"id": USER_ID, "question": "benchmark"})
+    }
+    stacks = {
+        "BaseHTTPMiddleware": _build_app(BaseHTTPCustomHeaderMiddleware, BaseHTTPAskPathMiddleware),
+        "ASGI": _build_app(CustomHeaderMiddleware, AskPathMiddleware)
+    }
+    endpoints = [("GET", "/ping", {}), ("POST", "/ask/query", ask_kwargs), ("GET", "/stream", {})]
+
+    monitor = None
+    if args.block_threshold_ms:
+        monitor = LoopLagMonitor(10, args.block_threshold_ms, block_threshold_ms=args.block_threshold_ms)
+        monitor.start()
+
+    results = {}
+    for method, path, kwargs in endpoints:
+        for name, app in stacks.items():
+            results[(path, name)] = await _measure(app, method, path, args, **kwargs)
+            throughput, p50 = results[(path, name)]
+            print(f"{path:<12} {name:<20} {throughput:>9.0f} req/s  p50={p50:.3f} ms")
+        speedup = results[(path, "ASGI")][0] / results[(path, "BaseHTTPMiddleware")][0]
+        print(f"{path:<12} {'speedup':<20} {speedup:>9.2f}x")
+
+    if monitor is None:
+        return True
+    await monitor.stop()
+    stats = monitor.stats()
+    print(f"loop lag p50={stats['p50_ms']:.2f} ms p99={stats['p99_ms']:.2f} ms max={stats['max_ms']:.2f} ms")
+    for blocked in stats["blocked_calls"]:
+        print(f"FAIL: event loop blocked for {blocked['blocked_ms']} ms at\n{blocked['stack']}", file=sys.stderr)
+    return not stats["blocked_calls"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the throughput of BaseHTTPMiddleware and plain ASGI middlewares")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint and stack")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight")
+    parser.add_argument("--block-threshold-ms", type=int, default=0, help="fail if the event loop is blocked this long, 0 to not check")
+    args = parser.parse_args(argv)
+
+    if not getuser.SUPABASE_JWT_SECRET:
+        # Only signs the benchmark's own token
+        getuser.SUPABASE_JWT_SECRET = os.urandom(32).hex()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Latency benchmark of the rule-only quick score.
+
+    python -m benchmarks.quick_score_benchmark
+    python -m benchmarks.quick_score_benchmark --profiles profiles.jsonl --iterations 2000 --budget-ms 10
+
+Every profile is scored --iterations times in this process. call_llm is
+replaced by a function that counts its calls, the run fails if the quick
+score called it or if the p99 latency is above the budget.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import utils.scorer.linkedin_score as linkedin_score
+from services.quick_score import quick_score
+
+
+SAMPLE_PROFILE = {
+    "profile": {
+        "name": "Jane Doe",
+        "headline": "Senior Backend Engineer | Python | FastAPI | PostgreSQL | Distributed systems and APIs",
+        "linkedin_url": "https://www.linkedin.com/in/jane-doe",
+        "connections": 600,
+        "location": "Pune, Maharashtra, India",
+        "profilePic": {"present": True},
+        "banner": True
+    },
+    "about": {"text": "Backend engineer with eight years of experience building APIs and data pipelines. " * 8},
+    "experience": [
+        {
+            "company": f"Company {index}",
+            "roles": [{
+                "title": "Software Engineer",
+                "from": "2019",
+                "to": "2021",
+                "location": "Pune",
+                "employment_type": "Full-time",
+                "description": "Built and operated the public REST APIs serving two million requests a day"
+            }]
+        }
+        for index in range(5)
+    ],
+    "education": [{"college": "College of Engineering", "field_of_study": "Computer Science", "from": "2011", "to": "2015"}],
+    "projects": [
+        {"title": f"Project {index}", "date": "2022", "description": "A small open source tool", "repo_link": "https://github.com/jane/tool"}
+        for index in range(4)
+    ],
+    "skills": [{"name": f"Skill {index}", "endorsements": index} for index in range(20)],
+    "certifications": [{"name": "AWS Solutions Architect", "issuer": "Amazon", "date": "2023"}],
+    "languages": [{"name": "English", "proficiency": "Professional"}],
+    "recommendations": {"received": [{"text": "Great engineer"}]}
+}
+
+
+def _load_profiles(path):
+    if not path:
+        return [SAMPLE_PROFILE]
+    profiles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                profiles.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return profiles
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def run(args):
+    profiles = _load_profiles(args.profiles)
+    llm_calls = []
+
+    async def forbidden_call_llm(*call_args, **call_kwargs):
+        llm_calls.append(call_kwargs.get("response_model"))
+        return {"error": "call_llm is not allowed in quick score"}
+
+    linkedin_score.call_llm = forbidden_call_llm
+
+    latencies = []
+    for data in profiles:
+        await quick_score(data)  # warm up
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            await quick_score(data)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    p50 = statistics.median(latencies)
+    p99 = _percentile(latencies, 99)
+    print(f"profiles={len(profiles)} runs={len(latencies)}")
+    print(f"mean={statistics.fmean(latencies):.3f} ms p50={p50:.3f} ms p99={p99:.3f} ms max={max(latencies):.3f} ms")
+    print(f"call_llm calls={len(llm_calls)}")
+
+    failed = False
+    if llm_calls:
+        print("FAIL: quick score called the LLM", file=sys.stderr)
+        failed = True
+    if p99 > args.budget_ms:
+        print(f"FAIL: p99 {p99:.3f} ms is above the {args.budget_ms} ms budget", file=sys.stderr)
+        failed = True
+    return not failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the latency of the rule-only quick score")
+    parser.add_argument("--profiles", help="JSONL file with one profile per line, a built-in sample is used otherwise")
+    parser.add_argument("--iterations", type=int, default=1000, help="runs per profile")
+    parser.add_argument("--budget-ms", type=float, default=10.0, help="p99 latency budget")
+    args = parser.parse_args(argv)
+
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Offline bulk scoring of LinkedIn profiles.
+
+Reads a JSONL file with one profile per line (the same JSON the checker
+endpoints accept) and writes one report per line to the output JSONL file.
+
+    python bulk_score.py profiles.jsonl reports.jsonl --workers 4 --llm-concurrency 8
+    python bulk_score.py profiles.jsonl reports.jsonl --resume
+    python bulk_score.py profiles.jsonl reports.jsonl --cassette llm.jsonl --cassette-mode replay
+
+Rule-only sections run in a process pool, LLM sections run in this process
+through the concurrency limited call_llm. Every process keeps its own
+section result cache, so a repeated section is scored once per process.
+After every batch the input byte offset and line number of the next
+unprocessed profile, and the size of the output written so far, are kept in
+<output>.offset. --resume truncates the output to that size and continues
+from that input offset, so every profile is written exactly once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.llm import set_llm_concurrency, use_cassette
+from services.section_cache import run_section, section_cache
+from services.section_scheduler import run_sections
+from utils.scorer.sections import SECTIONS_CONFIG, build_report
+from utils.scorer.sections import get_rule_sections, get_llm_sections
+
+
+_worker_loop = None
+
+
+def _score_rule_sections(data):
+    """
+    Run every rule-only section for one profile. Executed inside a pool worker.
+    """
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+
+    results = {}
+    for section_config in get_rule_sections():
+        try:
+            results[section_config["name"]] = _worker_loop.run_until_complete(run_section(section_config, data))
+        except Exception as e:
+            results[section_config["name"]] = {"error": str(e)}
+    return results
+
+
+async def score_profile(data, pool):
+    """
+    Score one profile and build the same report the stream endpoint stores
+    """
+    loop = asyncio.get_running_loop()
+    rule_future = loop.run_in_executor(pool, _score_rule_sections, data)
+    llm_results, llm_errors, _ = await run_sections(data, get_llm_sections())
+
+    results = {}
+    section_errors = dict(llm_errors)
+    for name, result in (await rule_future).items():
+        if "error" in result:
+            section_errors[name] = result["error"]
+        else:
+            results[name] = result
+    results.update(llm_results)
+
+    # Failed sections are left out of the report, as in the API
+    report = build_report(results, SECTIONS_CONFIG)
+    errors = [
+        {
+            "section_name": section_config["name"],
+            "display_name": section_config["display_name"],
+            "error": section_errors[section_config["name"]]
+        }
+        for section_config in SECTIONS_CONFIG
+        if section_config["name"] in section_errors
+    ]
+    if errors:
+        report["errors"] = errors
+    return report
+
+
+def _read_offset(offset_path):
+    """
+    Checkpoint of an interrupted run: {"input_offset", "line_number", "output_offset"}
+    """
+    checkpoint = {"input_offset": 0, "line_number": 0, "output_offset": 0}
+    if not os.path.exists(offset_path):
+        return checkpoint
+    with open(offset_path, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    if content.isdigit():
+        # Written by an older version: only the input offset, the output is kept as it is
+        checkpoint.update(input_offset=int(content), output_offset=None)
+    elif content:
+        checkpoint.update(json.loads(content))
+    return checkpoint
+
+
+def _write_offset(offset_path, input_offset, line_number, output_offset):
+    tmp_path = offset_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"input_offset": input_offset, "line_number": line_number, "output_offset": output_offset}, f)
+    os.replace(tmp_path, offset_path)
+
+
+def _read_batches(input_file, batch_size, line_number=0):
+    """
+    Yield lists of (line_end_offset, line_number, profile) from the current file position,
+    line_number is the number of the line before it
+    """
+    batch = []
+    while True:
+        line = input_file.readline()
+        if not line:
+            break
+        line_number += 1
+        offset = input_file.tell()
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            profile = json.loads(line)
+        except json.JSONDecodeError as e:
+            profile = {"__invalid__": str(e)}
+        if not isinstance(profile, dict):
+            # e.g. a list or a bare string, the scorers expect an object
+            profile = {"__invalid__": f"Expected a JSON object, got {type(profile).__name__}"}
+        batch.append((offset, line_number, profile))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def run(args):
+    if args.cassette:
+        use_cassette(args.cassette, args.cassette_mode)
+    set_llm_concurrency(args.llm_concurrency)
+
+    offset_path = args.output + ".offset"
+    checkpoint = _read_offset(offset_path) if args.resume else {"input_offset": 0, "line_number": 0, "output_offset": 0}
+    start_offset = checkpoint["input_offset"]
+
+    processed = 0
+    failed = 0
+    started = time.perf_counter()
+
+    with open(args.input, "r", encoding="utf-8") as input_file, \
+            open(args.output, "a" if args.resume else "w", encoding="utf-8") as output_file, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool:
+        input_file.seek(start_offset)
+        if checkpoint["output_offset"] is not None:
+            # Records written after the last checkpoint are scored again, drop them
+            output_file.truncate(checkpoint["output_offset"])
+        if start_offset:
+            print(f"Resuming {args.input} from line {checkpoint['line_number'] + 1} (byte offset {start_offset})", file=sys.stderr)
+
+        for batch in _read_batches(input_file, args.batch_size, checkpoint["line_number"]):
+            tasks = []
+            for _, _, profile in batch:
+                if "__invalid__" in profile:
+                    tasks.append(None)
+                else:
+                    tasks.append(asyncio.ensure_future(score_profile(profile, pool)))
+
+            for (offset, line_number, profile), task in zip(batch, tasks):
+                if task is None:
+                    record = {"line": line_number, "error": f"Invalid JSON: {profile['__invalid__']}"}
+                    failed += 1
+                else:
+                    try:
+                        report = await task
+                        record = {
+                            "line": line_number,
+                            "linkedin_url": profile.get("profile", {}).get("linkedin_url", ""),
+                            "report": report
+                        }
+                    except Exception as e:
+                        record = {"line": line_number, "error": str(e)}
+                        failed += 1
+                output_file.write(json.dumps(record) + "\n")
+                processed += 1
+
+            output_file.flush()
+            # The records are on disk before the checkpoint that skips their profiles
+            os.fsync(output_file.fileno())
+            _write_offset(offset_path, batch[-1][0], batch[-1][1], output_file.tell())
+
+            elapsed = time.perf_counter() - started
+            rate = processed / elapsed if elapsed > 0 else 0
+            print(f"\rprocessed {processed} profiles ({failed} failed) | {rate:.2f} profiles/s", end="", file=sys.stderr, flush=True)
+
+    print(file=sys.stderr)
+    print(f"Section cache of the main process: {section_cache.stats()}", file=sys.stderr)
+    return processed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a JSONL file of LinkedIn profiles offline")
+    parser.add_argument("input", help="JSONL file with one profile per line")
+    parser.add_argument("output", help="JSONL file the reports are written to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes used for rule-only sections")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="max concurrent LLM calls")
+    parser.add_argument("--batch-size", type=int, default=16, help="profiles scored concurrently before the offset is saved")
+    parser.add_argument("--resume", action="store_true", help="continue from the offset saved by an interrupted run")
+    parser.add_argument("--cassette", help="JSONL file used to record or replay LLM responses")
+    parser.add_argument("--cassette-mode", choices=["record", "replay"], default="replay")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted, rerun with --resume to continue from {args.output}.offset", file=sys.stderr)
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
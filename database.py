@@ -1,14 +1,49 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession 
 from sqlalchemy.orm import sessionmaker,declarative_base
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import time
 from dotenv import load_dotenv
+from services.request_timing import record_timing
+from services.metrics import DB_POOL_CHECKOUT_WAIT
+from services.query_stats import log_slow_query
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("SUPABASE_DB")
 
+# Each worker process opens up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, plus one
+# outside the pool for LISTEN once a follower replays a run from another worker
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Logs every statement and its parameters, synchronously, for local debugging only
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
 
-engine = create_async_engine(DATABASE_URL,echo = True,future = True)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that measures how long a checkout waited for a free connection
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo = DB_ECHO,
+    future = True,
+    pool_size = DB_POOL_SIZE,
+    max_overflow = DB_MAX_OVERFLOW,
+    pool_timeout = DB_POOL_TIMEOUT,
+    poolclass = TimedQueuePool
+)
 
 # Create session factory for AsyncSession
 AsyncSessionLocal = sessionmaker(
@@ -21,7 +56,77 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+
+class PoolMetrics:
+    """
+    How long connections are checked out of the pool, a connection held through
+    slow non database work shows up as a long hold
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.hold_total_ms = 0.0
+        self.max_hold_ms = 0.0
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        self.checkouts += 1
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        self.checked_out -= 1
+        hold_ms = (time.perf_counter() - checked_out_at) * 1000
+        self.hold_total_ms += hold_ms
+        self.max_hold_ms = max(self.max_hold_ms, hold_ms)
+
+    def stats(self):
+        pool = engine.pool
+        released = self.checkouts - self.checked_out
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "avg_hold_ms": round(self.hold_total_ms / released, 2) if released else 0.0,
+            "max_hold_ms": round(self.max_hold_ms, 2)
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    # Counted and summed per request, see RouteQueryStats
+    record_timing("db", duration_ms)
+    log_slow_query(statement, parameters, executemany, duration_ms)
+
+
+def _handle_error(exception_context):
+    # A failed statement gets no after_cursor_execute, drop its start time
+    connection = exception_context.connection
+    if connection is not None and exception_context.execution_context is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+pool_metrics = PoolMetrics()
+event.listen(engine.sync_engine, "checkout", pool_metrics.on_checkout)
+event.listen(engine.sync_engine, "checkin", pool_metrics.on_checkin)
+event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+event.listen(engine.sync_engine, "handle_error", _handle_error)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
-
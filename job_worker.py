@@ -0,0 +1,42 @@
+"""
+Standalone analysis job workers.
+
+Claims queued jobs from the analysis_job table and runs them, so LLM work
+can be scaled separately from the processes serving HTTP (run those with
+ANALYSIS_JOB_WORKERS=0).
+
+    python job_worker.py --workers 8
+"""
+import argparse
+import asyncio
+
+from services.job_queue import JOB_WORKERS, start_job_workers, stop_job_workers
+from services.report_writer import report_writer
+from logger import get_logger
+
+logger = get_logger("JobWorker")
+
+
+async def run(args):
+    workers = start_job_workers(args.workers)
+    logger.info("Started %d analysis job workers", len(workers))
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        await stop_job_workers()
+        await report_writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run analysis job workers without the HTTP server")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="concurrent jobs in this process")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+
+
+if __name__ == "__main__":
+    main()
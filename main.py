@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from logger import get_logger
 from api.routers.user import router as user_router
 from api.routers.auth_routes import router as auth_router 
@@ -6,6 +6,15 @@ from api.routers.ask import router as ask_router
 from api.routers.linkedin_checker_routes import router as linkedin_checker_router
 from middleware.middleware import CustomHeaderMiddleware
 from middleware.middleware import AskPathMiddleware
+from middleware.middleware import ProfilingMiddleware
+from services.job_queue import start_job_workers, stop_job_workers
+from services.report_writer import report_writer
+from database import pool_metrics
+from services.loop_monitor import loop_monitor
+from services import auth_gateway
+from services.metrics import render_metrics, CONTENT_TYPE
+from services.request_profiler import PROFILE_USER_IDS
+from services.query_stats import route_query_stats
 
 
 
@@ -14,6 +23,10 @@ logger = get_logger("Main")
 app = FastAPI()
 
 app.add_middleware(AskPathMiddleware)   
+# Inside CustomHeaderMiddleware so the profile gets the request's stage timings,
+# left out entirely unless someone may profile
+if PROFILE_USER_IDS:
+    app.add_middleware(ProfilingMiddleware)
 app.add_middleware(CustomHeaderMiddleware)
 
 logger.info("Middlewares added")
@@ -25,6 +38,55 @@ app.include_router(ask_router, prefix = "/ask")
 app.include_router(linkedin_checker_router)
 logger.info("Routers added")
 
+
+@app.on_event("startup")
+async def start_workers():
+    loop_monitor.start()
+    # Set ANALYSIS_JOB_WORKERS=0 to serve HTTP only and run job_worker.py separately
+    workers = start_job_workers()
+    logger.info("Started %d analysis job workers", len(workers))
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    await stop_job_workers()
+    # Reports of finished analyses that are still queued
+    await report_writer.close()
+    await loop_monitor.stop()
+
 @app.get("/")
 async def root():  # make it async for consistency
     return {"Message": "It's working well"}
+
+
+@app.get("/db/pool/stats")
+async def get_pool_stats():
+    """
+    Connections checked out of this process's pool and how long they were held
+    """
+    return pool_metrics.stats()
+
+
+@app.get("/db/queries/stats")
+async def get_query_stats():
+    """
+    SQL statements issued per route by this process's requests, most queries first
+    """
+    return route_query_stats.stats()
+
+
+@app.get("/loop/stats")
+async def get_loop_stats():
+    """
+    Event loop lag of this worker and the time spent in Supabase calls
+    """
+    return {"loop_lag": loop_monitor.stats(), "supabase": auth_gateway.stats()}
+
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics, summed over every worker when PROMETHEUS_MULTIPROC_DIR is set
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -1,58 +1,190 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, HTTPException
-from supabaseclient import supabase_public
+import asyncio
+import json
 import time
+from fastapi import Request, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from utils.getuser import get_current_user_id
+from services.request_timing import start_request_timing, end_request_timing, get_request_timing, timed
+from services.request_profiler import PROFILE_USER_IDS, is_profile_requested, start_request_profile
+from services.metrics import REQUEST_LATENCY
+from services.query_stats import route_query_stats
 from logger import get_logger
 
 logger = get_logger("MiddleWare")
 
-class CustomHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+# Plain ASGI middlewares: unlike BaseHTTPMiddleware they add no task per request
+# and pass streamed response chunks straight through
+
+
+class CustomHeaderMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.perf_counter()
-        
-        logger.info("Middleware triggered for %s %s", request.method, request.url)
-        
-        response = await call_next(request)
-        
-        process_time = time.perf_counter() - start_time
-        response.headers["X-Process-Time"] = f"{process_time:.4f}s"
-        
-        return response
-    
-
-
-class AskPathMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        target_paths = ["/ask"]
+        # Stages of the request add their time to it, see services/request_timing.py
+        timing, token = start_request_timing()
+
+        logger.info("Middleware triggered for %s %s", scope["method"], scope["path"])
+
+        status = 500
+
+        async def send_with_process_time(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                process_time = time.perf_counter() - start_time
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = f"{process_time:.4f}s"
+                # Streams only get the stages before their first byte, the rest is sent as a last event
+                headers["Server-Timing"] = timing.header_value()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_process_time)
+        finally:
+            end_request_timing(timing, token)
+            # The route template, not the path, keeps ids out of the labels
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=route,
+                status=str(status)
+            ).observe(time.perf_counter() - start_time)
+            query_ms, queries = timing.stage("db")
+            route_query_stats.record(route, queries, query_ms)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with X-Profile: 1 (or ?profile=1) by a user of
+    PROFILE_USER_IDS. The profile and the request's stage timings are written to
+    PROFILE_DIR under the id returned in the X-Profile-Id header. Other requests
+    only pay for the header check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            user_id = await get_current_user_id(Request(scope))
+        except HTTPException:
+            user_id = None
+        if user_id not in PROFILE_USER_IDS:
+            # Served as usual, the route answers unauthenticated requests itself
+            await self.app(scope, receive, send)
+            return
+
+        profile = start_request_profile()
+        status = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = profile.id if profile is not None else "busy"
+            await send(message)
 
+        if profile is None:
+            await self.app(scope, receive, send_with_profile_id)
+            return
+
+        try:
+            # Returns once the whole response, streams included, is sent
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.stop()
+            timing = get_request_timing()
+            route = scope.get("route")
+            details = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "user_id": user_id,
+                "status": status,
+                "timing": timing.to_dict() if timing is not None else None
+            }
+            try:
+                path = await asyncio.to_thread(profile.save, details)
+                logger.info("Saved profile of %s %s to %s.prof", scope["method"], scope["path"], path)
+            except OSError as e:
+                logger.error("Could not save profile %s: %s", profile.id, e)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class AskPathMiddleware:
+    """
+    Checks that /ask requests come from the user in the body's id. The verified
+    user id and the parsed body are left in request.state (user_id, json_body)
+    for the route, which reads neither again.
+    """
+
+    target_paths = ["/ask"]
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
         # Check if the path starts with any target path
-        if not any(request.url.path.startswith(path) for path in target_paths):
-            response =  await call_next(request)
-            return response
-        
-        auth_head = request.headers.get("Authorization")
-        if not auth_head or not auth_head.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Invalid token")
-        token = auth_head.split(" ")[1]
-
-        res = supabase_public.auth.get_user(token)
-        if not res.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        data = await request.json()
-        id = data.get("id")
-
-        print(id)
-        if not id:
-            raise HTTPException(status_code=400, detail="id field is required")
-        
-        if id != res.user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to access this user")
-        
-        response = await call_next(request)
-        return response
-            
-
-
-
-        
+        if scope["type"] != "http" or not any(scope["path"].startswith(path) for path in self.target_paths):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            # Verified locally, the endpoint reuses the user id from request.state
+            user_id = await get_current_user_id(Request(scope))
+
+            with timed("body"):
+                body = await _read_body(receive)
+                try:
+                    data = json.loads(body) if body else {}
+                except json.JSONDecodeError:
+                    raise HTTPException(status_code=400, detail="Invalid JSON body")
+            id = data.get("id") if isinstance(data, dict) else None
+
+            if not id:
+                raise HTTPException(status_code=400, detail="id field is required")
+
+            if id != user_id:
+                raise HTTPException(status_code=403, detail="Not authorized to access this user")
+        except HTTPException as e:
+            # Raised outside the app, so FastAPI's exception handlers would not see it
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code)
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["json_body"] = data
+
+        # The body was consumed above, replay it for anything that still reads it
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, String, Integer, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from database import Base
+
+
+class AnalysisRun(Base):
+    __tablename__ = "analysis_run"
+
+    run_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    profile_key = Column(String(64), nullable=True)  # hash of the profile data and options, see get_profile_key
+    status = Column(String(32), nullable=False, server_default="running")  # running, complete, failed
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("idx_analysis_run_user_id", "user_id"),
+        Index("idx_analysis_run_user_profile_key", "user_id", "profile_key"),
+    )
+
+
+class AnalysisRunEvent(Base):
+    __tablename__ = "analysis_run_event"
+
+    run_id = Column(UUID(as_uuid=True), ForeignKey("analysis_run.run_id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(Integer, primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_job"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    profile_data = Column(JSONB, nullable=False)
+    options = Column(JSONB, nullable=False, server_default="{}")
+    status = Column(String(32), nullable=False, server_default="queued")  # queued, running, complete, dead
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="3")
+    available_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    lease_until = Column(TIMESTAMP, nullable=True)
+    worker_id = Column(String(128), nullable=True)
+    run_id = Column(UUID(as_uuid=True), nullable=True)
+    result = Column(JSONB, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("idx_analysis_job_user_id", "user_id"),
+        Index("idx_analysis_job_claim", "status", "available_at"),
+    )
@@ -0,0 +1,481 @@
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from datetime import timedelta
+
+import asyncpg
+
+from sqlalchemy import update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal, DATABASE_URL
+from models.analysis_run import AnalysisRun, AnalysisRunEvent
+from services.request_timing import create_background_task
+from logger import get_logger
+
+logger = get_logger("AnalysisRuns")
+
+# How long a finished run stays in memory for reconnecting clients, storage serves it afterwards
+RUN_RETENTION_SECONDS = int(os.getenv("ANALYSIS_RUN_RETENTION_SECONDS", "300"))
+
+# Events buffered per subscriber, a subscriber that falls further behind catches up from the run's event log
+SUBSCRIBER_BUFFER_SIZE = int(os.getenv("ANALYSIS_SUBSCRIBER_BUFFER_SIZE", "64"))
+
+# A running run without a new event for this long belongs to a worker that is gone
+RUN_STALE_SECONDS = int(os.getenv("ANALYSIS_RUN_STALE_SECONDS", "120"))
+
+# Followers of a run on another worker re-read storage at least this often, in case a notification is missed
+REMOTE_POLL_SECONDS = float(os.getenv("ANALYSIS_REMOTE_POLL_SECONDS", "5"))
+
+# Events are stored behind the stream, at most this many per transaction
+EVENT_WRITE_BATCH_SIZE = int(os.getenv("ANALYSIS_EVENT_WRITE_BATCH_SIZE", "50"))
+EVENT_WRITE_ATTEMPTS = int(os.getenv("ANALYSIS_EVENT_WRITE_ATTEMPTS", "4"))
+
+NOTIFY_CHANNEL = "analysis_run_events"
+
+INTERRUPTED_EVENT = {
+    "message_type": "error",
+    "error": "The analysis was interrupted before it finished",
+    "message": "Analysis failed"
+}
+
+# Sent instead of the events of a run that could not be stored, a replay never skips events silently
+REPLAY_GAP_EVENT = {
+    "message_type": "error",
+    "error": "Some events of the analysis could not be replayed",
+    "message": "Analysis replay failed"
+}
+
+
+def is_terminal_event(event):
+    """
+    Events after which a client stream ends, the final report or a failure of the whole analysis
+    """
+    if event.get("message_type") == "complete_analysis":
+        return True
+    return event.get("message_type") == "error" and "section_name" not in event
+
+
+def format_event_id(run_id, event_id):
+    return f"{run_id}:{event_id}"
+
+
+def parse_event_id(value):
+    """
+    (run_id, event_id) of a Last-Event-ID header, None when it is not one of ours
+    """
+    if not value:
+        return None
+    run_id, _, event_id = value.strip().rpartition(":")
+    try:
+        return uuid.UUID(run_id), int(event_id)
+    except ValueError:
+        return None
+
+
+def _get_terminal_status(event):
+    if not is_terminal_event(event):
+        return None
+    return "complete" if event.get("message_type") == "complete_analysis" else "failed"
+
+
+def get_profile_key(data, **options):
+    """
+    Hash of the profile data and the analysis options, identical requests share a run
+    """
+    canonical = json.dumps({"data": data, "options": options}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER_SIZE)
+        self.overflowed = False
+
+
+class ActiveRun:
+    """
+    An analysis running in this process. Events are numbered from 1 and kept in
+    memory so subscribers can start from any event id, a background task stores
+    them in batches for followers on other workers and later replays.
+    Every subscriber gets its own bounded queue so a slow client never holds up the others.
+    """
+
+    def __init__(self, run_id, user_id, profile_key=None):
+        self.run_id = run_id
+        self.user_id = user_id
+        self.profile_key = profile_key
+        self.events = []
+        self.finished = False
+        self.task = None
+        self._subscribers = set()
+        # Published events not stored yet, written in order by the _writer task
+        self._unstored = []
+        self._writer = None
+
+    def _offer(self, item):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Dropped from the fan-out, the subscriber catches up from self.events
+                subscriber.overflowed = True
+                self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        """
+        Number the event, add it to the log and send it to the subscribers in one step
+        without awaiting, then queue it for storage. Returns the event id.
+        """
+        event_id = len(self.events) + 1
+        self.events.append((event_id, event))
+        if is_terminal_event(event) and _inflight_runs.get((self.user_id, self.profile_key)) is self:
+            # Later requests for the same profile start a new analysis
+            del _inflight_runs[(self.user_id, self.profile_key)]
+        self._offer((event_id, event))
+
+        self._unstored.append((event_id, event))
+        if self._writer is None or self._writer.done():
+            self._writer = create_background_task(self._write_events())
+        return event_id
+
+    async def _write_events(self):
+        """
+        Store the queued events in order, the ones published during a write go in the next batch
+        """
+        while self._unstored:
+            batch = self._unstored[:EVENT_WRITE_BATCH_SIZE]
+            for attempt in range(1, EVENT_WRITE_ATTEMPTS + 1):
+                try:
+                    await _store_events(self.run_id, batch)
+                    break
+                except Exception as e:
+                    if attempt == EVENT_WRITE_ATTEMPTS:
+                        # Still served from memory, a replay from storage reports the gap
+                        logger.error("Could not store events %d-%d of analysis run %s: %s", batch[0][0], batch[-1][0], self.run_id, e)
+                    else:
+                        logger.warning("Storing events of analysis run %s failed (attempt %d): %s", self.run_id, attempt, e)
+                        await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            del self._unstored[:len(batch)]
+
+    async def flush_events(self):
+        """
+        Wait until every published event has been written (or given up on)
+        """
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    def _finish(self):
+        self.finished = True
+        if _inflight_runs.get((self.user_id, self.profile_key)) is self:
+            del _inflight_runs[(self.user_id, self.profile_key)]
+        self._offer(None)
+
+    async def subscribe(self, last_event_id=0):
+        """
+        Yield (event_id, event) after last_event_id until the terminal event
+        """
+        position = max(last_event_id, 0)
+        while True:
+            # Catch up from the event log, then follow new events through a bounded queue
+            while position < len(self.events):
+                event_id, event = self.events[position]
+                position += 1
+                yield event_id, event
+                if is_terminal_event(event):
+                    return
+            if self.finished:
+                yield len(self.events) + 1, INTERRUPTED_EVENT
+                return
+
+            subscriber = _Subscriber()
+            self._subscribers.add(subscriber)
+            try:
+                while not (subscriber.overflowed and subscriber.queue.empty()):
+                    item = await subscriber.queue.get()
+                    if item is None:
+                        break
+                    event_id, event = item
+                    position = event_id
+                    yield event_id, event
+                    if is_terminal_event(event):
+                        return
+            finally:
+                self._subscribers.discard(subscriber)
+
+
+# run_id -> ActiveRun of the runs executing (or recently finished) in this process
+_active_runs = {}
+
+# (user_id, profile_key) -> ActiveRun that has not sent its final report yet
+_inflight_runs = {}
+
+# (user_id, profile_key) -> Future of the run id, while a request looks for a remote run or starts one
+_starting_runs = {}
+
+
+async def _store_run(run):
+    try:
+        async with AsyncSessionLocal() as db:
+            db.add(AnalysisRun(run_id=run.run_id, user_id=run.user_id, profile_key=run.profile_key, status="running"))
+            await db.commit()
+    except Exception as e:
+        logger.error("Could not store analysis run %s: %s", run.run_id, e)
+
+
+async def _store_events(run_id, events):
+    """
+    Store [(event_id, event)] and notify the other workers in one transaction, the
+    notification is only delivered once the events can be read
+    """
+    terminal_status = next((status for status in (_get_terminal_status(event) for _, event in events) if status), None)
+    async with AsyncSessionLocal() as db:
+        # Ignoring stored ids makes a retry after an unacknowledged commit harmless
+        await db.execute(
+            insert(AnalysisRunEvent.__table__)
+            .values([{"run_id": run_id, "event_id": event_id, "payload": event} for event_id, event in events])
+            .on_conflict_do_nothing()
+        )
+        values = {"updated_at": func.now()}
+        if terminal_status is not None:
+            values["status"] = terminal_status
+        await db.execute(update(AnalysisRun).where(AnalysisRun.run_id == run_id).values(**values))
+        notification = json.dumps({"run_id": str(run_id), "event_id": events[-1][0]})
+        await db.execute(select(func.pg_notify(NOTIFY_CHANNEL, notification)))
+        await db.commit()
+
+
+async def _set_run_status(run_id, status):
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(AnalysisRun).where(AnalysisRun.run_id == run_id, AnalysisRun.status == "running").values(status=status))
+            notification = json.dumps({"run_id": str(run_id), "status": status})
+            await db.execute(select(func.pg_notify(NOTIFY_CHANNEL, notification)))
+            await db.commit()
+    except Exception as e:
+        logger.error("Could not update analysis run %s: %s", run_id, e)
+
+
+async def _execute(run, produce):
+    try:
+        await produce(run)
+    except Exception as e:
+        logger.error("Analysis run %s failed: %s", run.run_id, e)
+        if not any(is_terminal_event(event) for _, event in run.events):
+            run.publish({"message_type": "error", "error": str(e), "message": "Analysis failed"})
+    finally:
+        run._finish()
+        # The terminal event sets the stored status, it has to be written before the check below
+        await run.flush_events()
+        # Only changes a run that never published its terminal event
+        await _set_run_status(run.run_id, "failed")
+        asyncio.get_running_loop().call_later(RUN_RETENTION_SECONDS, _active_runs.pop, run.run_id, None)
+
+
+async def start_run(user_id, produce, profile_key=None):
+    """
+    Start produce(run) in the background as a new run of the user and return the run.
+    The work continues when the client that started it disconnects.
+    """
+    run = ActiveRun(uuid.uuid4(), user_id, profile_key)
+    _active_runs[run.run_id] = run
+    if profile_key is not None:
+        _inflight_runs[(user_id, profile_key)] = run
+    await _store_run(run)
+    run.task = create_background_task(_execute(run, produce))
+    logger.info("Started analysis run %s for user %s", run.run_id, user_id)
+    return run
+
+
+def _is_live(stored_run_query):
+    return stored_run_query.where(
+        AnalysisRun.status == "running",
+        AnalysisRun.updated_at > func.now() - timedelta(seconds=RUN_STALE_SECONDS)
+    )
+
+
+async def _find_remote_run(user_id, profile_key):
+    try:
+        async with AsyncSessionLocal() as db:
+            query = select(AnalysisRun.run_id).where(AnalysisRun.user_id == user_id, AnalysisRun.profile_key == profile_key)
+            return await db.scalar(_is_live(query).order_by(AnalysisRun.created_at.desc()).limit(1))
+    except Exception as e:
+        logger.error("Could not look up running analyses of user %s: %s", user_id, e)
+        return None
+
+
+async def attach_or_start_run(user_id, profile_key, produce):
+    """
+    Return (run_id, attached): the in-flight run of the user for the same profile,
+    on this worker or another one, or a new run
+    """
+    key = (user_id, profile_key)
+    run = _inflight_runs.get(key)
+    if run is not None:
+        logger.info("Attaching to analysis run %s for user %s (%d subscribers)", run.run_id, user_id, len(run._subscribers))
+        return run.run_id, True
+
+    starting = _starting_runs.get(key)
+    if starting is not None:
+        # An identical request of this process is between the checks and start_run, share its run
+        run_id = await asyncio.shield(starting)
+        logger.info("Attaching to analysis run %s for user %s", run_id, user_id)
+        return run_id, True
+
+    starting = asyncio.get_running_loop().create_future()
+    _starting_runs[key] = starting
+    try:
+        remote_run_id = await _find_remote_run(user_id, profile_key)
+        if remote_run_id is not None and remote_run_id not in _active_runs:
+            logger.info("Attaching to analysis run %s of another worker for user %s", remote_run_id, user_id)
+            starting.set_result(remote_run_id)
+            return remote_run_id, True
+
+        run_id = (await start_run(user_id, produce, profile_key)).run_id
+        starting.set_result(run_id)
+        return run_id, False
+    except BaseException as e:
+        if not starting.done():
+            starting.set_exception(e if isinstance(e, Exception) else RuntimeError("Starting the analysis run was cancelled"))
+            # Retrieved by the waiters, if there are none it must not be reported as never retrieved
+            starting.exception()
+        raise
+    finally:
+        del _starting_runs[key]
+
+
+async def _load_stored_run(run_id):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(AnalysisRun).where(AnalysisRun.run_id == run_id))
+
+
+async def run_exists(run_id, user_id):
+    run = _active_runs.get(run_id)
+    if run is not None:
+        return run.user_id == user_id
+    stored_run = await _load_stored_run(run_id)
+    return stored_run is not None and stored_run.user_id == user_id
+
+
+# run_id -> asyncio.Event of every local follower of a run executing on another worker
+_remote_waiters = {}
+_listener_connection = None
+_listener_lock = asyncio.Lock()
+
+
+def _on_notification(connection, pid, channel, payload):
+    try:
+        run_id = uuid.UUID(json.loads(payload)["run_id"])
+    except (ValueError, KeyError, TypeError):
+        return
+    for waiter in _remote_waiters.get(run_id, ()):
+        waiter.set()
+
+
+def _on_listener_terminated(connection):
+    global _listener_connection
+    logger.warning("LISTEN connection lost, followers poll until it is reopened")
+    if _listener_connection is connection:
+        _listener_connection = None
+    # Frees the socket of a connection that broke without a clean close
+    connection.terminate()
+    for waiters in _remote_waiters.values():
+        for waiter in waiters:
+            waiter.set()
+
+
+async def _ensure_listener():
+    """
+    LISTEN on a dedicated asyncpg connection opened on first use. It stays open for
+    the life of the process, so it is kept out of the engine's pool.
+    """
+    global _listener_connection
+    if _listener_connection is not None:
+        return
+    async with _listener_lock:
+        if _listener_connection is not None:
+            return
+        connection = None
+        try:
+            url = make_url(DATABASE_URL).set(drivername="postgresql")
+            connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+            await connection.add_listener(NOTIFY_CHANNEL, _on_notification)
+            connection.add_termination_listener(_on_listener_terminated)
+            _listener_connection = connection
+            logger.info("Listening for analysis events on %s", NOTIFY_CHANNEL)
+        except Exception as e:
+            if connection is not None:
+                connection.terminate()
+            logger.warning("Could not LISTEN on %s, followers fall back to polling: %s", NOTIFY_CHANNEL, e)
+
+
+async def _load_run_events(run_id, last_event_id):
+    """
+    (is the run still producing events, [(event_id, event)] after last_event_id)
+    """
+    async with AsyncSessionLocal() as db:
+        live = await db.scalar(_is_live(select(AnalysisRun.run_id).where(AnalysisRun.run_id == run_id)))
+        result = await db.execute(
+            select(AnalysisRunEvent)
+            .where(AnalysisRunEvent.run_id == run_id, AnalysisRunEvent.event_id > last_event_id)
+            .order_by(AnalysisRunEvent.event_id)
+        )
+        return live is not None, [(stored_event.event_id, stored_event.payload) for stored_event in result.scalars()]
+
+
+async def _follow_stored_run(run_id, last_event_id):
+    """
+    Replay a run from storage and, while another worker is still executing it,
+    follow its new events as their notifications arrive
+    """
+    waiter = asyncio.Event()
+    _remote_waiters.setdefault(run_id, set()).add(waiter)
+    try:
+        await _ensure_listener()
+        while True:
+            waiter.clear()
+            live, stored_events = await _load_run_events(run_id, last_event_id)
+            for event_id, event in stored_events:
+                if event_id != last_event_id + 1:
+                    # Events are stored in order, a missing one was never written
+                    logger.warning("Analysis run %s is missing event %d in storage", run_id, last_event_id + 1)
+                    yield last_event_id + 1, REPLAY_GAP_EVENT
+                    return
+                last_event_id = event_id
+                yield event_id, event
+                if is_terminal_event(event):
+                    return
+            if not live:
+                # The run is not executing anywhere and never finished, the worker running it is gone
+                logger.info("Analysis run %s has no live producer", run_id)
+                yield last_event_id + 1, INTERRUPTED_EVENT
+                return
+            try:
+                await asyncio.wait_for(waiter.wait(), REMOTE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        waiters = _remote_waiters.get(run_id)
+        if waiters is not None:
+            waiters.discard(waiter)
+            if not waiters:
+                del _remote_waiters[run_id]
+
+
+async def stream_run(run_id, last_event_id=0):
+    """
+    Yield (event_id, event) of a run after last_event_id, from memory when the run
+    executes in this process, otherwise from storage and notifications of the worker running it
+    """
+    run = _active_runs.get(run_id)
+    if run is not None:
+        async for item in run.subscribe(last_event_id):
+            yield item
+        return
+
+    async for item in _follow_stored_run(run_id, last_event_id):
+        yield item
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import HTTPException
+
+import supabaseclient
+from logger import get_logger
+
+logger = get_logger("AuthGateway")
+
+# The Supabase SDK clients are synchronous, their calls run on this pool instead of the event loop
+SUPABASE_THREADS = int(os.getenv("SUPABASE_THREADS", "8"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10"))
+
+_executor = ThreadPoolExecutor(max_workers=SUPABASE_THREADS, thread_name_prefix="supabase")
+_call_stats = {}
+# Session key -> [asyncio.Lock, requests holding or waiting for it]
+_user_client_locks = {}
+
+
+async def _call(name, func, *args, **kwargs):
+    """
+    Run a blocking SDK call on the pool. After the timeout the caller gets a 504,
+    the thread itself cannot be interrupted and finishes in the background.
+    """
+    stats = _call_stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0})
+    stats["calls"] += 1
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, partial(func, *args, **kwargs)),
+            SUPABASE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        stats["timeouts"] += 1
+        logger.error("Supabase %s timed out after %.1f s", name, SUPABASE_TIMEOUT_SECONDS)
+        raise HTTPException(status_code=504, detail=f"Supabase {name} timed out")
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+async def sign_up(credentials):
+    return await _call("sign_up", supabaseclient.supabase.auth.sign_up, credentials)
+
+
+async def sign_in_with_password(credentials):
+    return await _call("sign_in_with_password", supabaseclient.supabase.auth.sign_in_with_password, credentials)
+
+
+async def delete_user(user_id):
+    # Requires the service role client
+    return await _call("delete_user", supabaseclient.supabase.auth.admin.delete_user, user_id)
+
+
+async def get_user(token):
+    return await _call("get_user", supabaseclient.supabase_public.auth.get_user, token)
+
+
+@asynccontextmanager
+async def user_client(claims, access_token, refresh_token):
+    """
+    Supabase client authenticated as the user, from the pool when the session has one.
+    Requests of the same session take turns using it, its session is not thread safe.
+    """
+    key = supabaseclient.get_session_key(claims, access_token)
+    entry = _user_client_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield await _call("get_user_client", supabaseclient.get_user_client, claims, access_token, refresh_token)
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _user_client_locks[key]
+
+
+async def get_session_user(client):
+    return await _call("get_session_user", client.auth.get_user)
+
+
+async def update_user(client, attributes):
+    return await _call("update_user", client.auth.update_user, attributes)
+
+
+def stats():
+    return {
+        "threads": SUPABASE_THREADS,
+        "timeout_seconds": SUPABASE_TIMEOUT_SECONDS,
+        "calls": {
+            name: {
+                "calls": call["calls"],
+                "errors": call["errors"],
+                "timeouts": call["timeouts"],
+                "avg_ms": round(call["total_ms"] / call["calls"], 2) if call["calls"] else 0.0,
+                "max_ms": round(call["max_ms"], 2)
+            }
+            for name, call in _call_stats.items()
+        },
+        "user_clients": supabaseclient.user_client_pool.stats()
+    }
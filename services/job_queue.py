@@ -0,0 +1,251 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import timedelta
+from functools import partial
+
+from sqlalchemy import update, func, or_, and_
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models.analysis_run import AnalysisJob
+from utils.scorer.sections import get_sections_subset
+from services.analysis_runs import start_run, is_terminal_event
+from services.profile_analysis import run_profile_analysis
+from logger import get_logger
+
+logger = get_logger("JobQueue")
+
+# Async workers per process, 0 for processes that only serve HTTP
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = int(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", "120"))
+JOB_POLL_SECONDS = float(os.getenv("ANALYSIS_JOB_POLL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("ANALYSIS_JOB_RETRY_BASE_SECONDS", "5"))
+
+_job_submitted = asyncio.Event()
+_worker_tasks = []
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def job_to_dict(job):
+    return {
+        "job_id": str(job.job_id),
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_id": str(job.run_id) if job.run_id else None,
+        "result": job.result,
+        "error": job.last_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+
+async def submit_job(user_id, data, options=None):
+    """
+    Queue a profile analysis and return the job id
+    """
+    job_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        db.add(AnalysisJob(
+            job_id=job_id,
+            user_id=user_id,
+            profile_data=data,
+            options=options or {},
+            status="queued",
+            attempts=0,
+            max_attempts=JOB_MAX_ATTEMPTS
+        ))
+        await db.commit()
+    # Workers of this process pick it up right away, the others on their next poll
+    _job_submitted.set()
+    logger.info("Queued analysis job %s for user %s", job_id, user_id)
+    return job_id
+
+
+async def get_job(job_id, user_id):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(AnalysisJob).where(AnalysisJob.job_id == job_id, AnalysisJob.user_id == user_id))
+
+
+async def claim_job(worker_id):
+    """
+    Lease the oldest available job, or a running job whose lease expired.
+    Rows locked by another worker's claim are skipped instead of waited on.
+    """
+    claimable = (
+        select(AnalysisJob.job_id)
+        .where(or_(
+            and_(AnalysisJob.status == "queued", AnalysisJob.available_at <= func.now()),
+            and_(AnalysisJob.status == "running", AnalysisJob.lease_until < func.now())
+        ))
+        .order_by(AnalysisJob.available_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            update(AnalysisJob)
+            .where(AnalysisJob.job_id == claimable)
+            .values(
+                status="running",
+                attempts=AnalysisJob.attempts + 1,
+                lease_until=func.now() + timedelta(seconds=JOB_LEASE_SECONDS),
+                worker_id=worker_id,
+                updated_at=func.now()
+            )
+            .returning(AnalysisJob)
+        )
+        await db.commit()
+        return job
+
+
+async def _update_owned_job(job_id, worker_id, **values):
+    """
+    Update a job only while this worker still holds its lease, return whether it did
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.job_id == job_id, AnalysisJob.worker_id == worker_id, AnalysisJob.status == "running")
+            .values(updated_at=func.now(), **values)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+
+async def _renew_lease(job_id, worker_id):
+    """
+    Extend the lease every third of its length. A renewal that fails is retried
+    while the lease lasts, the job is given up before another worker can claim it.
+    """
+    loop = asyncio.get_running_loop()
+    retry_seconds = min(5, JOB_LEASE_SECONDS / 10)
+    lease_until = loop.time() + JOB_LEASE_SECONDS
+    delay = JOB_LEASE_SECONDS / 3
+    while True:
+        await asyncio.sleep(delay)
+        attempted_at = loop.time()
+        try:
+            renewed = await _update_owned_job(job_id, worker_id, lease_until=func.now() + timedelta(seconds=JOB_LEASE_SECONDS))
+        except Exception as e:
+            remaining = lease_until - loop.time()
+            if remaining <= 2 * retry_seconds:
+                raise LeaseLost(f"Lease of job {job_id} could not be renewed: {e}")
+            logger.warning("Renewing the lease of job %s failed, retrying (%.0f s left): %s", job_id, remaining, e)
+            delay = retry_seconds
+            continue
+        if not renewed:
+            raise LeaseLost(f"Lease of job {job_id} was lost")
+        lease_until = attempted_at + JOB_LEASE_SECONDS
+        delay = JOB_LEASE_SECONDS / 3
+
+
+async def _run_job(job, worker_id):
+    """
+    Run the analysis of a job as an analysis run so it can be streamed, return the final report
+    """
+    options = job.options or {}
+    requested_sections = get_sections_subset(options["sections"]) if options.get("sections") else None
+    analysis_run = await start_run(
+        job.user_id,
+        partial(run_profile_analysis, data=job.profile_data, user_id=job.user_id, requested_sections=requested_sections)
+    )
+    await _update_owned_job(job.job_id, worker_id, run_id=analysis_run.run_id)
+
+    try:
+        await asyncio.shield(analysis_run.task)
+    except asyncio.CancelledError:
+        analysis_run.task.cancel()
+        raise
+
+    terminal = next((event for _, event in reversed(analysis_run.events) if is_terminal_event(event)), None)
+    if terminal is None or terminal.get("message_type") != "complete_analysis":
+        raise Exception(terminal.get("error", "Analysis failed") if terminal else "Analysis did not finish")
+    return terminal
+
+
+async def _process_job(job, worker_id):
+    if job.attempts > job.max_attempts:
+        # Its lease expired on every attempt, most likely the worker died while running it
+        await _update_owned_job(job.job_id, worker_id, status="dead", lease_until=None, last_error=job.last_error or "Lease expired too many times")
+        logger.error("Analysis job %s moved to dead letter after %d attempts", job.job_id, job.max_attempts)
+        return
+
+    work = asyncio.ensure_future(_run_job(job, worker_id))
+    heartbeat = asyncio.ensure_future(_renew_lease(job.job_id, worker_id))
+    try:
+        await asyncio.wait({work, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        if not work.done():
+            # Another worker owns the job now (or can claim it soon), stop its run before taking another job
+            logger.warning("Analysis job %s: %s, cancelling its run", job.job_id, heartbeat.exception())
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            return
+        report = work.result()
+        await _update_owned_job(job.job_id, worker_id, status="complete", result=report, lease_until=None, last_error=None)
+        logger.info("Analysis job %s complete", job.job_id)
+    except Exception as e:
+        if job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            await _update_owned_job(
+                job.job_id, worker_id,
+                status="queued", lease_until=None, last_error=str(e),
+                available_at=func.now() + timedelta(seconds=delay)
+            )
+            logger.warning("Analysis job %s failed (attempt %d), retrying in %.0f s: %s", job.job_id, job.attempts, delay, e)
+        else:
+            await _update_owned_job(job.job_id, worker_id, status="dead", lease_until=None, last_error=str(e))
+            logger.error("Analysis job %s moved to dead letter after %d attempts: %s", job.job_id, job.attempts, e)
+    finally:
+        heartbeat.cancel()
+        if not work.done():
+            work.cancel()
+
+
+async def _worker(worker_id):
+    logger.info("Job worker %s started", worker_id)
+    while True:
+        try:
+            job = await claim_job(worker_id)
+        except Exception as e:
+            logger.error("Job worker %s could not claim a job: %s", worker_id, e)
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_job_submitted.wait(), JOB_POLL_SECONDS)
+                _job_submitted.clear()
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await _process_job(job, worker_id)
+        except Exception as e:
+            # E.g. the status update failed with the database down, the job is claimable again once its lease expires
+            logger.error("Job worker %s could not process job %s: %s", worker_id, job.job_id, e)
+
+
+def start_job_workers(count=None):
+    """
+    Start the job workers of this process, ANALYSIS_JOB_WORKERS of them by default
+    """
+    count = JOB_WORKERS if count is None else count
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    for index in range(count):
+        _worker_tasks.append(asyncio.ensure_future(_worker(f"{prefix}:{index}")))
+    return list(_worker_tasks)
+
+
+async def stop_job_workers():
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
@@ -0,0 +1,159 @@
+import asyncio
+from functools import partial
+
+from utils.scorer.sections import SECTIONS_CONFIG, get_section_input
+from utils.scorer.upper_bound import get_rule_only_result
+from services.section_cache import run_section, section_cache, get_section_cache_key
+from logger import get_logger
+
+logger = get_logger("LiveScoring")
+
+PENDING_MESSAGE = "AI analysis will run when you stop typing"
+
+
+def apply_patch(data, patch):
+    """
+    JSON merge patch: dicts are merged recursively, None deletes a key, anything else replaces
+    """
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(data) if isinstance(data, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = apply_patch(merged.get(key), value)
+    return merged
+
+
+class LiveScoringSession:
+    """
+    Scores a profile that is being edited.
+
+    Every patch re-runs the rule checks of the sections whose input changed right
+    away. The LLM checks of a section run once it has not changed for the debounce
+    delay, and a newer patch cancels the LLM work still running for older text.
+    Each result is pushed with send as a section delta.
+    """
+
+    def __init__(self, send, debounce_ms=800, sections=None):
+        self._send = send
+        # The debounced LLM tasks and the receive loop send on the same socket
+        self._send_lock = asyncio.Lock()
+        self.debounce = debounce_ms / 1000
+        self.sections = SECTIONS_CONFIG if sections is None else sections
+        self.data = {}
+        self.version = 0
+        self.results = {}
+        self._inputs = {}
+        self._llm_tasks = {}
+
+    def _get_total_score(self):
+        return round(sum(
+            self.results[section_config["name"]].get("score", 0)
+            for section_config in self.sections
+            if section_config["feeds_total"] and section_config["name"] in self.results
+        ))
+
+    async def send(self, message):
+        """
+        Send a message to the client, one at a time
+        """
+        async with self._send_lock:
+            await self._send(message)
+
+    async def _send_delta(self, section_config, result, version):
+        self.results[section_config["name"]] = result
+        formatted_result = section_config["formatter"](result)
+        if result.get("provisional"):
+            formatted_result["provisional"] = True
+        await self.send({
+            "message_type": "section_delta",
+            "version": version,
+            "score": self._get_total_score(),
+            "sections": [formatted_result]
+        })
+
+    async def _send_error(self, section_config, error, version):
+        await self.send({
+            "message_type": "error",
+            "version": version,
+            "section_name": section_config["name"],
+            "display_name": section_config["display_name"],
+            "error": error,
+            "message": "Analysis failed"
+        })
+
+    async def _run_llm_section(self, section_config, data, version):
+        try:
+            await asyncio.sleep(self.debounce)
+            result = await run_section(section_config, data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._send_error(section_config, str(e), version)
+            return
+        await self._send_delta(section_config, result, version)
+
+    def _schedule_llm_section(self, section_config, data, version):
+        name = section_config["name"]
+        stale = self._llm_tasks.pop(name, None)
+        if stale is not None:
+            stale.cancel()
+        task = asyncio.ensure_future(self._run_llm_section(section_config, data, version))
+        self._llm_tasks[name] = task
+        task.add_done_callback(partial(self._forget_llm_task, name))
+
+    def _forget_llm_task(self, name, task):
+        if self._llm_tasks.get(name) is task:
+            del self._llm_tasks[name]
+
+    def _get_changed_sections(self):
+        changed = []
+        for section_config in self.sections:
+            section_input = get_section_input(section_config, self.data)
+            if self._inputs.get(section_config["name"]) != section_input:
+                self._inputs[section_config["name"]] = section_input
+                changed.append(section_config)
+        return changed
+
+    async def apply(self, patch, replace=False):
+        """
+        Apply a profile patch (or the whole profile with replace) and push the
+        instant results of the sections it changed
+        """
+        self.data = apply_patch({} if replace else self.data, patch)
+        self.version += 1
+        version = self.version
+        changed = self._get_changed_sections()
+
+        for section_config in changed:
+            try:
+                if section_config["cost"] == "llm":
+                    # Text seen before (e.g. an undo) has its complete result cached already. A miss is
+                    # counted by run_section once the debounced LLM run looks the text up again
+                    result = section_cache.get(get_section_cache_key(section_config, self.data), count_miss=False)
+                    if result is None:
+                        result = await get_rule_only_result(section_config, self.data, PENDING_MESSAGE)
+                else:
+                    result = await run_section(section_config, self.data)
+            except Exception as e:
+                await self._send_error(section_config, str(e), version)
+                continue
+
+            if result.get("provisional"):
+                self._schedule_llm_section(section_config, self.data, version)
+            else:
+                # The section no longer needs the LLM, drop any work queued for older text
+                stale = self._llm_tasks.pop(section_config["name"], None)
+                if stale is not None:
+                    stale.cancel()
+            await self._send_delta(section_config, result, version)
+
+        logger.debug("Patch %d changed %d sections", version, len(changed))
+        return changed
+
+    def close(self):
+        for task in self._llm_tasks.values():
+            task.cancel()
+        self._llm_tasks.clear()
@@ -1,16 +1,144 @@
 import httpx
 import json
 import re
+import asyncio
+import hashlib
+import time
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
 from typing import Type, TypeVar
 from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 import os
+from services.request_timing import record_timing, timed
+from services.metrics import LLM_LATENCY, record_llm_tokens
 load_dotenv()
 T = TypeVar('T', bound=BaseModel)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = os.getenv("GROQ_API_URL")
 
+# Max number of in-flight Groq requests per process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Record/replay of LLM responses so scoring can run without network access
+# LLM_CASSETTE_MODE is "record" or "replay", LLM_CASSETTE is the JSONL file
+LLM_CASSETTE = os.getenv("LLM_CASSETTE")
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "")
+
+_llm_semaphore = None
+_cassette = None
+
+# Failed LLM calls of the current unit of work, see track_llm_failures
+_llm_failures = contextvars.ContextVar("llm_failures", default=None)
+
+
+@contextmanager
+def track_llm_failures():
+    """
+    Collect the errors of every LLM call made inside the block, including the
+    ones the scorers swallow and replace with a fallback result
+    """
+    failures = []
+    token = _llm_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _llm_failures.reset(token)
+
+
+def _note_llm_failure(error: str):
+    failures = _llm_failures.get()
+    if failures is not None:
+        failures.append(error)
+
+
+def set_llm_concurrency(limit: int):
+    """
+    Change the max number of concurrent LLM calls
+    """
+    global LLM_MAX_CONCURRENCY, _llm_semaphore
+    LLM_MAX_CONCURRENCY = limit
+    _llm_semaphore = None
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+
+@asynccontextmanager
+async def _llm_slot():
+    """
+    Hold one of the LLM concurrency slots, the wait for it is timed separately from the call
+    """
+    started = time.perf_counter()
+    async with _get_llm_semaphore():
+        record_timing("llm-wait", (time.perf_counter() - started) * 1000)
+        yield
+
+
+async def _post(client, model, headers, payload):
+    """
+    Send the request to Groq, recording its latency and status per model
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with timed("llm"):
+            response = await client.post(GROQ_API_URL, headers=headers, json=payload)
+        status = str(response.status_code)
+        return response
+    finally:
+        LLM_LATENCY.labels(model=model, status=status).observe(time.perf_counter() - started)
+
+
+def use_cassette(path: str, mode: str):
+    """
+    Record LLM responses to a JSONL file or replay them from it.
+    mode is "record" or "replay".
+    """
+    global LLM_CASSETTE, LLM_CASSETTE_MODE, _cassette
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown cassette mode: {mode}")
+    LLM_CASSETTE = path
+    LLM_CASSETTE_MODE = mode
+    _cassette = None
+
+
+def _load_cassette() -> dict:
+    global _cassette
+    if _cassette is None:
+        _cassette = {}
+        if LLM_CASSETTE and os.path.exists(LLM_CASSETTE):
+            with open(LLM_CASSETTE, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        _cassette[entry["key"]] = entry["result"]
+    return _cassette
+
+
+def _cassette_key(
+    system_message: str,
+    prompt: str,
+    response_model: Type[T],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    raw = json.dumps([model, system_message, prompt, response_model.__name__, temperature, max_tokens])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _record_response(key: str, result: dict):
+    _load_cassette()[key] = result
+    with open(LLM_CASSETTE, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": key, "result": result}) + "\n")
+
 
 
 def extract_json_from_markdown(content: str) -> str:
@@ -62,6 +190,49 @@ async def call_llm(
     Call Groq's LLM API and validate response using a Pydantic model.
     """
 
+    try:
+        result = await _call_llm(system_message, prompt, response_model, model, temperature, max_tokens)
+    except Exception as e:
+        _note_llm_failure(str(e))
+        raise
+    if "error" in result:
+        _note_llm_failure(result["error"])
+    return result
+
+
+async def _call_llm(
+    system_message: str,
+    prompt: str,
+    response_model: Type[T],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> dict:
+    if LLM_CASSETTE and LLM_CASSETTE_MODE in ("record", "replay"):
+        key = _cassette_key(system_message, prompt, response_model, model, temperature, max_tokens)
+        cassette = _load_cassette()
+        if key in cassette:
+            return cassette[key]
+        if LLM_CASSETTE_MODE == "replay":
+            raise Exception(f"No recorded LLM response in {LLM_CASSETTE} for {response_model.__name__}")
+
+        result = await _call_groq(system_message, prompt, response_model, model, temperature, max_tokens)
+        if "error" not in result:
+            # A malformed response is not replayed, the next recording run asks again
+            _record_response(key, result)
+        return result
+
+    return await _call_groq(system_message, prompt, response_model, model, temperature, max_tokens)
+
+
+async def _call_groq(
+    system_message: str,
+    prompt: str,
+    response_model: Type[T],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> dict:
     if not GROQ_API_KEY:
         raise ValueError("GROQ_API_KEY not found. Please add it to your .env file.")
 
@@ -82,11 +253,12 @@ async def call_llm(
         "max_completion_tokens": max_tokens,  # ✅ correct param for Groq
     }
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with _llm_slot(), httpx.AsyncClient(timeout=60.0) as client:
         try:
-            response = await client.post(GROQ_API_URL, headers=headers, json=payload)
+            response = await _post(client, model, headers, payload)
             response.raise_for_status()
             response_data = response.json()
+            record_llm_tokens(model, response_data.get("usage"))
 
             content = response_data["choices"][0]["message"]["content"].strip()
             
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from logger import get_logger
+from services.metrics import LOOP_LAG, LOOP_BLOCKS
+
+logger = get_logger("LoopMonitor")
+
+LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+# Lag above this is logged, something blocked the event loop for that long
+LOOP_LAG_WARN_MS = int(os.getenv("LOOP_LAG_WARN_MS", "200"))
+# Debug mode: a watchdog thread logs the event loop thread's stack while a single
+# callback has been running for longer than LOOP_BLOCK_THRESHOLD_MS, i.e. the call blocking it
+LOOP_BLOCK_DEBUG = os.getenv("LOOP_BLOCK_DEBUG", "0") == "1"
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: how much later than asked a sleep wakes up.
+    Every SSE stream of the worker is delayed by the same amount. With a
+    block_threshold_ms a watchdog thread also captures the stack of any single
+    callback that keeps the loop busy past that threshold.
+    """
+
+    def __init__(self, interval_ms: int, warn_ms: int, window: int = 600, block_threshold_ms: int = None):
+        self.interval = interval_ms / 1000
+        self.warn_ms = warn_ms
+        self.block_threshold_ms = block_threshold_ms
+        self._samples = deque(maxlen=window)
+        self._task = None
+        self.max_lag_ms = 0.0
+        self.slow_ticks = 0
+        # Start of the loop callback running now, set in debug mode, read by the watchdog thread
+        self._callback_started = None
+        self._original_handle_run = None
+        self._loop_thread_id = None
+        self._watchdog = None
+        self._stop_watchdog = threading.Event()
+        self.blocked_calls = deque(maxlen=20)
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self._samples.append(lag_ms)
+            LOOP_LAG.observe(lag_ms / 1000)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms >= self.warn_ms:
+                self.slow_ticks += 1
+                logger.warning("Event loop lagged %.0f ms", lag_ms)
+
+    def _install_callback_clock(self):
+        """
+        Stamp the start of every event loop callback (asyncio Handle), so the watchdog
+        can tell one long callback from many short ones. Debug only, it adds a call
+        per callback.
+        """
+        monitor = self
+        original_run = asyncio.events.Handle._run
+
+        def _run(handle):
+            monitor._callback_started = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                monitor._callback_started = None
+
+        self._original_handle_run = original_run
+        asyncio.events.Handle._run = _run
+
+    def _watch(self):
+        captured = None
+        while not self._stop_watchdog.wait(self.block_threshold_ms / 4000):
+            started = self._callback_started
+            if started is None or started == captured:
+                continue
+            blocked_ms = (time.perf_counter() - started) * 1000
+            if blocked_ms < self.block_threshold_ms:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # The callback is still running, so this stack shows where it blocks
+            captured = started
+            stack = "".join(traceback.format_stack(frame))
+            del frame
+            LOOP_BLOCKS.inc()
+            self.blocked_calls.append({"blocked_ms": round(blocked_ms), "at": time.time(), "stack": stack})
+            logger.warning("Event loop callback running for %.0f ms, loop thread stack:\n%s", blocked_ms, stack)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        if self.block_threshold_ms and self._watchdog is None:
+            self._loop_thread_id = threading.get_ident()
+            self._install_callback_clock()
+            self._stop_watchdog.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._stop_watchdog.set()
+            self._watchdog.join()
+            self._watchdog = None
+            asyncio.events.Handle._run = self._original_handle_run
+
+    def stats(self):
+        samples = list(self._samples)
+        return {
+            "interval_ms": round(self.interval * 1000),
+            "samples": len(samples),
+            "p50_ms": round(_percentile(samples, 50), 2) if samples else 0.0,
+            "p99_ms": round(_percentile(samples, 99), 2) if samples else 0.0,
+            "window_max_ms": round(max(samples), 2) if samples else 0.0,
+            "max_ms": round(self.max_lag_ms, 2),
+            "slow_ticks": self.slow_ticks,
+            "block_threshold_ms": self.block_threshold_ms,
+            "blocked_calls": list(self.blocked_calls)
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    LOOP_LAG_INTERVAL_MS,
+    LOOP_LAG_WARN_MS,
+    block_threshold_ms=LOOP_BLOCK_THRESHOLD_MS if LOOP_BLOCK_DEBUG else None
+)
@@ -0,0 +1,116 @@
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With several workers (uvicorn --workers, gunicorn) set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by them: every process writes its values there and /metrics
+# of any worker reports the sum of all of them
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template, streamed responses until their last byte",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+SECTION_LATENCY = Histogram(
+    "section_scorer_duration_seconds",
+    "Section scorer run time, cache hits excluded",
+    ["section"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+SECTION_FAILURES = Counter(
+    "section_scorer_failures_total",
+    "Section scorers that raised",
+    ["section"]
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Upstream LLM request time, without the wait for a concurrency slot",
+    ["model", "status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by model, kind is prompt or completion",
+    ["model", "kind"]
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Lookups of the in-process caches (section, auth_token, supabase_user_client)",
+    ["cache", "result"]
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time waited for a connection from the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued by one request, an executemany counts once",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+DB_QUERY_SECONDS = Counter(
+    "db_query_seconds_total",
+    "Time requests spent executing SQL statements",
+    ["route"]
+)
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How much later than asked the loop monitor's sleep woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocked_total",
+    "Times the watchdog caught the event loop blocked past LOOP_BLOCK_THRESHOLD_MS (LOOP_BLOCK_DEBUG=1)"
+)
+ACTIVE_STREAMS = Gauge(
+    "sse_active_streams",
+    "Open Server-Sent Events streams",
+    multiprocess_mode="livesum"
+)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_llm_tokens(model, usage):
+    if not usage:
+        return
+    LLM_TOKENS.labels(model=model, kind="prompt").inc(usage.get("prompt_tokens", 0))
+    LLM_TOKENS.labels(model=model, kind="completion").inc(usage.get("completion_tokens", 0))
+
+
+async def count_stream(chunks):
+    """
+    Pass an SSE body through and count it as an active stream while it is open
+    """
+    ACTIVE_STREAMS.inc()
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        ACTIVE_STREAMS.dec()
+
+
+def render_metrics():
+    """
+    Text exposition of the metrics, of every worker in multiprocess mode
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -0,0 +1,183 @@
+from uuid import UUID
+from typing import Dict, Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from utils.scorer.sections import SECTIONS_CONFIG, build_report, get_section_config
+from utils.scorer.upper_bound import get_rule_only_result
+from services.analysis_runs import ActiveRun
+from services.report_store import load_linkedin_report
+from services.report_writer import report_writer
+from services.section_cache import run_section
+from services.section_scheduler import SectionsRun
+from services.request_timing import timed
+from logger import get_logger
+
+logger = get_logger("ProfileAnalysis")
+
+PROVISIONAL_MESSAGE = "AI analysis is still in progress, the complete report will be available shortly"
+
+
+async def get_stored_report_for_merge(db: AsyncSession, user_id: Optional[UUID] = None, linkedin_url: Optional[str] = None):
+    """
+    Stored report the re-scored sections are merged into, None when it cannot be merged with
+    """
+    # A report still waiting in the write-behind queue is newer than the stored one
+    stored_report = report_writer.get_pending_report(user_id=user_id, linkedin_url=linkedin_url)
+    if stored_report is None:
+        stored_report = await load_linkedin_report(db, user_id=user_id, linkedin_url=linkedin_url)
+    # Reports stored before raw section scores were kept cannot give a correct total
+    if not stored_report or "section_scores" not in stored_report:
+        return None
+    return stored_report
+
+
+async def get_provisional_results(run: SectionsRun, data: Dict[str, Any], sections_config) -> Dict[str, Any]:
+    """
+    Results of the finished sections plus rule based fallbacks for the unfinished ones
+    """
+    results = dict(run.results)
+    for section_config in sections_config:
+        name = section_config["name"]
+        if name in run.results or name in run.errors:
+            continue
+        try:
+            if section_config["cost"] == "llm":
+                results[name] = await get_rule_only_result(section_config, data, PROVISIONAL_MESSAGE)
+            else:
+                results[name] = await run_section(section_config, data)
+        except Exception as e:
+            logger.warning("No fallback for section %s: %s", name, e)
+    return results
+
+
+async def finish_sections_run(run: SectionsRun, data: Dict[str, Any], user_id: Optional[UUID], stored_report: Optional[Dict[str, Any]]):
+    """
+    Let a run that missed its deadline complete and store the complete report for the user
+    """
+    try:
+        results = await run.wait()
+        if run.errors:
+            logger.warning("Background analysis finished with errors: %s", run.errors)
+        if user_id is not None:
+            report_writer.enqueue(user_id, data, build_report(results, SECTIONS_CONFIG, stored_report))
+            logger.info("Queued complete report for user %s", user_id)
+    except Exception as e:
+        logger.error("Background analysis failed: %s", e)
+
+
+async def run_profile_analysis(analysis_run: ActiveRun, data: Dict[str, Any], user_id: UUID, deadline: Optional[float] = None, requested_sections=None):
+    """
+    Process LinkedIn profile sections and publish results to the run as they complete.
+    When the deadline passes, unfinished sections are answered with provisional
+    rule based results and the full analysis is completed and stored afterwards.
+    With requested_sections only those are scored and merged into the stored report.
+    """
+    run = None
+    try:
+        analysis_run.publish({"message_type": "analysis_started", "run_id": str(analysis_run.run_id)})
+
+        # Initialize total score
+        total_score = 0
+        
+        sections_config = SECTIONS_CONFIG
+        stored_report = None
+        if requested_sections is not None:
+            async with AsyncSessionLocal() as db:
+                stored_report = await get_stored_report_for_merge(db, user_id=user_id)
+            if stored_report is None:
+                logger.info("No stored report to merge for user %s, scoring every section", user_id)
+            else:
+                sections_config = requested_sections
+                # The streamed total starts from the stored scores of the sections that are not re-scored
+                requested_names = {section_config["name"] for section_config in requested_sections}
+                total_score = sum(
+                    score for name, score in stored_report["section_scores"].items()
+                    if name not in requested_names and get_section_config(name)["feeds_total"]
+                )
+        completed = {}
+
+        # Process sections as a dependency graph, results are published in completion order
+        run = SectionsRun(data, sections_config)
+        async for node in run.nodes(deadline):
+            section_config = node["section"]
+            try:
+                if node["error"] is not None:
+                    raise Exception(node["error"])
+
+                # Get score
+                score_result = node["result"]
+                
+                # Format result
+                with timed("format"):
+                    formatted_result = section_config["formatter"](score_result)
+                
+                # Update total score
+                if section_config["feeds_total"]:
+                    section_score = score_result.get("score", 0)
+                    total_score += section_score
+                
+                # Add to completed sections
+                completed[section_config["name"]] = formatted_result
+
+                stream = round(total_score)
+                
+                # Send section result
+                section_response = {
+                    "message_type" : "section_analysis",
+                    "score": stream,
+                    "sections": [formatted_result],
+                    "timing": node["timing"]
+                }
+                
+                analysis_run.publish(section_response)
+                
+                
+            except Exception as e:
+                # Send error for this section
+                error_response = {
+                    "message_type": "error",
+                    "section_name": section_config["name"],
+                    "display_name": section_config["display_name"],
+                    "error": str(e),
+                    "total_score": total_score,
+                    "progress": len(completed),
+                    "total_sections": len(sections_config),
+                    "message": "Analysis failed"
+                }
+                analysis_run.publish(error_response)
+
+        if run.finished:
+            # Send final response, in section order regardless of completion order
+            results = run.results
+        else:
+            logger.info("Deadline reached for user %s, answering with provisional results", user_id)
+            results = await get_provisional_results(run, data, sections_config)
+        with timed("format"):
+            final_response = build_report(results, SECTIONS_CONFIG, stored_report)
+        
+        # Store in database, written behind so the final event is not held by the write
+        with timed("persist"):
+            report_writer.enqueue(user_id, data, final_response)
+        
+        analysis_run.publish(final_response)
+
+        if not run.finished:
+            # The complete report replaces the provisional one once the remaining sections finish
+            await finish_sections_run(run, data, user_id, stored_report)
+        logger.info("Section timings for user %s: %s", user_id, run.timings)
+        
+
+
+    except Exception as e:
+        # Send error response
+        error_response = {
+            "message_type": "error",
+            "error": str(e),
+            "message": "Analysis failed"
+        }
+        analysis_run.publish(error_response)
+    finally:
+        if run is not None:
+            run.cancel()
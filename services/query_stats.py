@@ -0,0 +1,75 @@
+import os
+from logger import get_logger
+from services.metrics import DB_QUERIES_PER_REQUEST, DB_QUERY_SECONDS
+
+logger = get_logger("SQL")
+
+# Statements running at least this long are logged, with their parameters redacted
+DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+
+def _redact_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return f"<{type(value).__name__}[{len(value)}]>"
+    return f"<{type(value).__name__}>"
+
+
+def _redact_row(row):
+    if isinstance(row, dict):
+        return {name: _redact_value(value) for name, value in row.items()}
+    if isinstance(row, (list, tuple)):
+        return [_redact_value(value) for value in row]
+    return _redact_value(row)
+
+
+def redact_parameters(parameters, executemany=False):
+    """
+    Types of the bound parameters in place of their values, e.g. ['<str>', '<int>', None].
+    An executemany gives its row count and the first row.
+    """
+    if executemany:
+        return {"rows": len(parameters), "first": _redact_row(parameters[0]) if parameters else None}
+    return _redact_row(parameters)
+
+
+def log_slow_query(statement, parameters, executemany, duration_ms):
+    if duration_ms < DB_SLOW_QUERY_MS:
+        return
+    logger.warning(
+        "Slow query %.0f ms: %s parameters=%s",
+        duration_ms,
+        " ".join(statement.split()),
+        redact_parameters(parameters, executemany)
+    )
+
+
+class RouteQueryStats:
+    """
+    Queries issued and time spent in them per route template, summed over the
+    requests this process served
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def record(self, route, queries, duration_ms):
+        DB_QUERIES_PER_REQUEST.labels(route=route).observe(queries)
+        DB_QUERY_SECONDS.labels(route=route).inc(duration_ms / 1000)
+        totals = self._routes.setdefault(route, {"requests": 0, "queries": 0, "query_ms": 0.0, "max_queries": 0})
+        totals["requests"] += 1
+        totals["queries"] += queries
+        totals["query_ms"] += duration_ms
+        totals["max_queries"] = max(totals["max_queries"], queries)
+
+    def stats(self):
+        routes = {route: dict(totals) for route, totals in self._routes.items()}
+        for totals in routes.values():
+            totals["avg_queries"] = round(totals["queries"] / totals["requests"], 2)
+            totals["query_ms"] = round(totals["query_ms"], 2)
+        # Routes issuing the most queries first
+        return dict(sorted(routes.items(), key=lambda item: item[1]["queries"], reverse=True))
+
+
+route_query_stats = RouteQueryStats()
@@ -0,0 +1,31 @@
+import time
+
+from utils.scorer.sections import SECTIONS_CONFIG, build_report
+from utils.scorer.upper_bound import get_rule_only_result
+from logger import get_logger
+
+logger = get_logger("QuickScore")
+
+PENDING_MESSAGE = "Pending: this check needs the AI analysis, run the full analysis to complete it"
+
+
+async def quick_score(data, sections=None):
+    """
+    Rule-only report of a profile that never calls the LLM.
+    LLM dependent checks are marked pending and their sections flagged provisional,
+    sections that would not need the LLM anyway get their real result.
+    """
+    sections = SECTIONS_CONFIG if sections is None else sections
+    started = time.perf_counter()
+
+    results = {}
+    for section_config in sections:
+        try:
+            results[section_config["name"]] = await get_rule_only_result(section_config, data, PENDING_MESSAGE)
+        except Exception as e:
+            logger.warning("Quick score of section %s failed: %s", section_config["name"], e)
+
+    report = build_report(results, sections)
+    report["message_type"] = "quick_analysis"
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return report
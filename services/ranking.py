@@ -0,0 +1,137 @@
+import asyncio
+import heapq
+
+from utils.scorer.sections import SECTIONS_CONFIG
+from utils.scorer.upper_bound import RULE_PARTS
+from services.section_cache import run_section
+from logger import get_logger
+
+logger = get_logger("Ranking")
+
+
+async def _get_candidate_bounds(index, data):
+    """
+    Score the rule sections that feed the total and bound the LLM sections
+    """
+    exact_score = 0
+    upper_bound = 0
+    llm_calls = 0
+    section_scores = {}
+
+    for section_config in SECTIONS_CONFIG:
+        name = section_config["name"]
+        if not section_config["feeds_total"]:
+            continue
+        if section_config["cost"] == "llm":
+            rule_part = RULE_PARTS[name](data)
+            upper_bound += rule_part["max_score"]
+            llm_calls += rule_part["llm_calls"]
+        else:
+            try:
+                result = await run_section(section_config, data)
+                section_scores[name] = result.get("score", 0)
+            except Exception:
+                section_scores[name] = 0
+            exact_score += section_scores[name]
+            upper_bound += section_scores[name]
+
+    return {
+        "index": index,
+        "linkedin_url": data.get("profile", {}).get("linkedin_url", ""),
+        "exact_score": exact_score,
+        "upper_bound": upper_bound,
+        "llm_calls": llm_calls,
+        "section_scores": section_scores
+    }
+
+
+async def _score_llm_sections(candidate, data):
+    """
+    Run the LLM sections that feed the total and complete the candidate score
+    """
+    llm_sections = [
+        section_config for section_config in SECTIONS_CONFIG
+        if section_config["cost"] == "llm" and section_config["feeds_total"]
+    ]
+
+    async def run(section_config):
+        try:
+            return (await run_section(section_config, data)).get("score", 0)
+        except Exception:
+            # Same as the stream endpoint, a failed section does not count towards the total
+            return 0
+
+    scores = await asyncio.gather(*[run(section_config) for section_config in llm_sections])
+    for section_config, score in zip(llm_sections, scores):
+        candidate["section_scores"][section_config["name"]] = score
+    candidate["score"] = candidate["exact_score"] + sum(scores)
+    return candidate
+
+
+async def rank_top_k(profiles, k, concurrency=4):
+    """
+    Return the k best profiles by total score.
+
+    Rule sections are scored for every profile first. Profiles are then fully
+    scored in order of their best achievable score, and the LLM sections are
+    skipped for every profile whose upper bound cannot beat the current k-th score.
+    """
+    candidates = [await _get_candidate_bounds(index, data) for index, data in enumerate(profiles)]
+    candidates.sort(key=lambda candidate: candidate["upper_bound"], reverse=True)
+
+    top = []  # min-heap of (score, index, candidate)
+    in_flight = set()
+    llm_calls_made = 0
+    llm_calls_avoided = 0
+    pruned = 0
+    position = 0
+
+    def kth_score():
+        return top[0][0] if len(top) >= k else None
+
+    while position < len(candidates) or in_flight:
+        while position < len(candidates) and len(in_flight) < concurrency:
+            candidate = candidates[position]
+            threshold = kth_score()
+            if threshold is not None and candidate["upper_bound"] <= threshold:
+                # Candidates are sorted by upper bound, none of the rest can get in either
+                for rest in candidates[position:]:
+                    llm_calls_avoided += rest["llm_calls"]
+                    pruned += 1
+                position = len(candidates)
+                break
+            llm_calls_made += candidate["llm_calls"]
+            in_flight.add(asyncio.ensure_future(_score_llm_sections(candidate, profiles[candidate["index"]])))
+            position += 1
+
+        if not in_flight:
+            break
+
+        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            candidate = task.result()
+            entry = (candidate["score"], -candidate["index"], candidate)
+            if len(top) < k:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+
+    ranked = [entry[2] for entry in sorted(top, key=lambda entry: entry[:2], reverse=True)]
+    logger.info("Ranked %d profiles, %d pruned, %d LLM calls avoided", len(profiles), pruned, llm_calls_avoided)
+
+    return {
+        "top": [
+            {
+                "index": candidate["index"],
+                "linkedin_url": candidate["linkedin_url"],
+                "score": round(candidate["score"]),
+                "section_scores": candidate["section_scores"]
+            }
+            for candidate in ranked
+        ],
+        "profiles": len(profiles),
+        "fully_scored": len(profiles) - pruned,
+        "pruned": pruned,
+        "llm_calls_made": llm_calls_made,
+        "llm_calls_avoided": llm_calls_avoided
+    }
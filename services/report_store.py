@@ -0,0 +1,92 @@
+from sqlalchemy import String, bindparam, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models.user_linkedin_profile import UserLinkedInProfile
+from models.linkedin_profile import LinkedInProfile
+
+
+async def load_linkedin_report(db: AsyncSession, user_id=None, linkedin_url=None):
+    """
+    Stored report of the user's LinkedIn profile, or of the profile URL when no user is given
+    """
+    if user_id is not None:
+        user_profile_query = select(UserLinkedInProfile).where(UserLinkedInProfile.user_id == user_id)
+        user_profile = await db.scalar(user_profile_query)
+        if not user_profile:
+            return None
+        linkedin_url = user_profile.linkedin_profile_url
+
+    if not linkedin_url:
+        return None
+
+    linkedin_profile_query = select(LinkedInProfile).where(LinkedInProfile.profile_url == linkedin_url)
+    linkedin_profile = await db.scalar(linkedin_profile_query)
+    if not linkedin_profile:
+        return None
+    return linkedin_profile.profile_report_data
+
+
+def _get_upsert_report_statement():
+    """
+    One statement storing a report: upsert the linkedin_profile row of the profile
+    URL, then point the user's user_linkedin_profile row at it.
+    Without a URL in the data the user's current profile URL is kept.
+    """
+    user_id = bindparam("user_id", type_=UUID(as_uuid=True))
+    linkedin_url = bindparam("linkedin_url", type_=String)
+    profile_url = func.coalesce(
+        func.nullif(linkedin_url, ""),
+        select(UserLinkedInProfile.linkedin_profile_url).where(UserLinkedInProfile.user_id == user_id).scalar_subquery(),
+        ""
+    )
+
+    # Table inserts, not ORM ones, so a list of parameters runs as a plain executemany
+    profile_insert = insert(LinkedInProfile.__table__).values(
+        profile_url=profile_url,
+        profile_data=bindparam("profile_data", type_=JSONB),
+        profile_report_data=bindparam("profile_report_data", type_=JSONB)
+    )
+    profile_upsert = profile_insert.on_conflict_do_update(
+        index_elements=[LinkedInProfile.profile_url],
+        set_={
+            "profile_data": profile_insert.excluded.profile_data,
+            "profile_report_data": profile_insert.excluded.profile_report_data
+        }
+    ).returning(LinkedInProfile.__table__.c.profile_url).cte("profile")
+
+    user_insert = insert(UserLinkedInProfile.__table__).from_select(
+        ["user_id", "linkedin_profile_url"],
+        select(user_id, profile_upsert.c.profile_url)
+    )
+    # A changed URL re-points the user at the row of the new URL, the row of the old URL stays as the report of that profile
+    return user_insert.on_conflict_do_update(
+        index_elements=[UserLinkedInProfile.user_id],
+        set_={"linkedin_profile_url": user_insert.excluded.linkedin_profile_url}
+    )
+
+
+UPSERT_REPORT_STATEMENT = _get_upsert_report_statement()
+
+
+def _get_upsert_report_params(user_id, data, report):
+    return {
+        "user_id": user_id,
+        "linkedin_url": data.get("profile", {}).get("linkedin_url", "") or "",
+        "profile_data": data,
+        "profile_report_data": report
+    }
+
+
+async def write_linkedin_report(db: AsyncSession, user_id, data, report):
+    """
+    Add the profile data and its report for the user to the transaction, the caller commits
+    """
+    await db.execute(UPSERT_REPORT_STATEMENT, _get_upsert_report_params(user_id, data, report))
+
+
+async def write_linkedin_reports(db: AsyncSession, reports):
+    """
+    Same as write_linkedin_report for (user_id, data, report) tuples, sent as one executemany
+    """
+    await db.execute(UPSERT_REPORT_STATEMENT, [_get_upsert_report_params(*entry) for entry in reports])
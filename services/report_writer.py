@@ -0,0 +1,203 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from database import AsyncSessionLocal
+from services.report_store import write_linkedin_report, write_linkedin_reports
+from services.request_timing import create_background_task
+from logger import get_logger
+
+logger = get_logger("ReportWriter")
+
+REPORT_WRITE_BATCH_SIZE = int(os.getenv("REPORT_WRITE_BATCH_SIZE", "50"))
+REPORT_WRITE_FLUSH_MS = int(os.getenv("REPORT_WRITE_FLUSH_MS", "200"))
+# A report that fails to write is queued again after REPORT_WRITE_RETRY_MS, doubled on
+# every attempt, so a short database outage does not lose it
+REPORT_WRITE_MAX_ATTEMPTS = int(os.getenv("REPORT_WRITE_MAX_ATTEMPTS", "8"))
+REPORT_WRITE_RETRY_MS = int(os.getenv("REPORT_WRITE_RETRY_MS", "1000"))
+
+
+class ReportWriter:
+    """
+    Write-behind store of analysis reports.
+
+    Reports are queued and written in batches by a background task, once the
+    batch size is reached or the flush interval passed. Only the latest report
+    of a user is kept while it waits, and queued reports are returned by
+    get_pending_report so readers of this process see them before they are written.
+    Reports that fail are retried with a backoff until max_attempts.
+    """
+
+    def __init__(self, batch_size: int, flush_ms: int, max_attempts: int = REPORT_WRITE_MAX_ATTEMPTS, retry_ms: int = REPORT_WRITE_RETRY_MS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.max_attempts = max_attempts
+        self.retry_interval = retry_ms / 1000
+        self._pending = OrderedDict()
+        self._writing = {}
+        # user_id -> (failed attempts, perf_counter time of the next attempt) of queued reports that failed
+        self._retries = {}
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+        self.max_batch_ms = 0.0
+        self._write_latency_total_ms = 0.0
+        self.max_write_latency_ms = 0.0
+
+    def enqueue(self, user_id, data, report):
+        if user_id in self._pending:
+            # An older report of the user was not written yet, only the newest one is
+            self._pending.pop(user_id)
+            self.coalesced += 1
+        # A new report starts over, also when the previous one was waiting for a retry
+        self._retries.pop(user_id, None)
+        self._pending[user_id] = (data, report, time.perf_counter())
+        if len(self._pending) >= self.batch_size:
+            self._flush_requested.set()
+        if self._task is None or self._task.done():
+            # Started by the first enqueue, which runs inside a request
+            self._task = create_background_task(self._run())
+
+    def get_pending_report(self, user_id=None, linkedin_url=None):
+        """
+        Report queued for the user (or the profile URL) that may not be written yet
+        """
+        for entries in (self._pending, self._writing):
+            if user_id is not None and user_id in entries:
+                return entries[user_id][1]
+            if user_id is None and linkedin_url:
+                for data, report, _ in reversed(list(entries.values())):
+                    if data.get("profile", {}).get("linkedin_url", "") == linkedin_url:
+                        return report
+        return None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Report flush failed: %s", e)
+
+    async def flush(self, retry_all=False):
+        """
+        Write every queued report that is due, one session and connection per batch.
+        retry_all also writes the reports still waiting for their retry time.
+        """
+        async with self._flush_lock:
+            now = time.perf_counter()
+            due = [
+                user_id for user_id in self._pending
+                if retry_all or self._retries.get(user_id, (0, 0))[1] <= now
+            ]
+            for start in range(0, len(due), self.batch_size):
+                batch = OrderedDict(
+                    (user_id, self._pending.pop(user_id)) for user_id in due[start:start + self.batch_size]
+                    if user_id in self._pending
+                )
+                self._writing = batch
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    # No connection at all, the whole batch is tried again
+                    for user_id, entry in batch.items():
+                        self._retry_later(user_id, entry, e)
+                finally:
+                    self._writing = {}
+
+    def _retry_later(self, user_id, entry, error):
+        if user_id in self._pending:
+            # A newer report of the user was queued during the write, it replaces this one
+            return
+        attempts = self._retries.get(user_id, (0, 0))[0] + 1
+        if attempts >= self.max_attempts:
+            self._retries.pop(user_id, None)
+            self.failed += 1
+            logger.error("Dropping report of user %s after %d failed attempts: %s", user_id, attempts, error)
+            return
+        delay = self.retry_interval * 2 ** (attempts - 1)
+        self._retries[user_id] = (attempts, time.perf_counter() + delay)
+        self._pending[user_id] = entry
+        self.retried += 1
+        logger.warning("Could not save report of user %s (attempt %d), retrying in %.1f s: %s", user_id, attempts, delay, error)
+
+    async def _write_batch(self, batch):
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            try:
+                await write_linkedin_reports(db, [(user_id, data, report) for user_id, (data, report, _) in batch.items()])
+                await db.commit()
+                written = list(batch.items())
+            except Exception as e:
+                # Write one by one so a bad report does not drop the rest of the batch
+                await db.rollback()
+                logger.warning("Batch write of %d reports failed, writing them one by one: %s", len(batch), e)
+                written = []
+                for user_id, entry in batch.items():
+                    try:
+                        await write_linkedin_report(db, user_id, entry[0], entry[1])
+                        await db.commit()
+                        written.append((user_id, entry))
+                    except Exception as e:
+                        try:
+                            await db.rollback()
+                        except Exception:
+                            # The connection is gone as well, the session gets a new one
+                            pass
+                        self._retry_later(user_id, entry, e)
+
+        finished = time.perf_counter()
+        for user_id, (_, _, enqueued_at) in written:
+            self._retries.pop(user_id, None)
+            latency_ms = (finished - enqueued_at) * 1000
+            self._write_latency_total_ms += latency_ms
+            self.max_write_latency_ms = max(self.max_write_latency_ms, latency_ms)
+        self.written += len(written)
+        self.batches += 1
+        self.last_batch_ms = (finished - started) * 1000
+        self.max_batch_ms = max(self.max_batch_ms, self.last_batch_ms)
+        logger.info("Wrote %d reports in %.1f ms", len(written), self.last_batch_ms)
+
+    async def close(self):
+        """
+        Stop the background task and make a last attempt at what is still queued
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.max_attempts = 0
+        await self.flush(retry_all=True)
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed": self.failed,
+            "retried": self.retried,
+            "waiting_for_retry": len(self._retries),
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "flush_ms": round(self.flush_interval * 1000),
+            "last_batch_ms": round(self.last_batch_ms, 2),
+            "max_batch_ms": round(self.max_batch_ms, 2),
+            # Time from the end of the analysis until its report was committed
+            "avg_write_latency_ms": round(self._write_latency_total_ms / self.written, 2) if self.written else 0.0,
+            "max_write_latency_ms": round(self.max_write_latency_ms, 2)
+        }
+
+
+# One writer per process shared by streamed analyses, deadline completions and the job workers
+report_writer = ReportWriter(REPORT_WRITE_BATCH_SIZE, REPORT_WRITE_FLUSH_MS)
@@ -0,0 +1,83 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+from logger import get_logger
+
+logger = get_logger("Profiler")
+
+# Users allowed to profile their requests, profiling is off while it is empty
+PROFILE_USER_IDS = {user_id.strip() for user_id in os.getenv("PROFILE_USER_IDS", "").split(",") if user_id.strip()}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "logs/profiles")
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "40"))
+
+# cProfile hooks the whole thread, so only one request of the process is profiled at a time
+_profile_lock = threading.Lock()
+
+
+def is_profile_requested(scope) -> bool:
+    """
+    True for a request sent with an X-Profile: 1 header or a profile=1 query parameter
+    """
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value == b"1"
+    query_string = scope.get("query_string", b"")
+    return b"profile" in query_string and parse_qs(query_string.decode("latin-1")).get("profile") == ["1"]
+
+
+class RequestProfile:
+    """
+    cProfile of one request. The profiler runs on the event loop thread, so it sees
+    every task the request awaits or spawns while it runs, and also the tasks of
+    requests served at the same time. Work handed to threads (auth gateway,
+    asyncio.to_thread) only shows up as time spent awaiting it.
+    """
+
+    def __init__(self):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._profiler = cProfile.Profile()
+
+    def start(self):
+        self._profiler.enable()
+
+    def stop(self):
+        self._profiler.disable()
+        _profile_lock.release()
+
+    def save(self, details: dict) -> str:
+        """
+        Write <id>.prof (open with snakeviz or pstats) and <id>.json with the request's
+        details, stage timings and top functions. Blocking, run it in a thread.
+        """
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.id)
+        self._profiler.dump_stats(f"{path}.prof")
+
+        output = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_FUNCTIONS)
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({"id": self.id, **details, "top_functions": output.getvalue()}, f, indent=2, default=str)
+        return path
+
+
+def start_request_profile():
+    """
+    New running profile, None while another request is being profiled
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profile = RequestProfile()
+    try:
+        profile.start()
+    except ValueError:
+        # Another profiler (e.g. a developer's cProfile run) already hooks the thread
+        _profile_lock.release()
+        return None
+    return profile
@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Timing collector of the current request, set by CustomHeaderMiddleware
+_request_timing = contextvars.ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """
+    Time spent per stage of one request: auth, body, db, section-<name>, llm-wait,
+    llm, format, persist. Stages that run several times (or concurrently) are summed
+    and their count is kept.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages = {}
+        self.closed = False
+
+    def add(self, name, duration_ms):
+        if self.closed:
+            # Work of a task that outlived the request, it is not part of it
+            return
+        stage = self._stages.setdefault(name, [0.0, 0])
+        stage[0] += duration_ms
+        stage[1] += 1
+
+    def stage(self, name):
+        """
+        (ms, count) of a stage, (0.0, 0) if the request never entered it
+        """
+        ms, count = self._stages.get(name, (0.0, 0))
+        return ms, count
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def to_dict(self):
+        stages = {name: {"ms": round(ms, 2), "count": count} for name, (ms, count) in self._stages.items()}
+        stages["total"] = {"ms": round(self.total_ms(), 2), "count": 1}
+        return stages
+
+    def header_value(self):
+        """
+        Server-Timing header value, e.g. auth;dur=0.1, db;dur=4.2;desc="3x", total;dur=812.0
+        """
+        metrics = []
+        for name, (ms, count) in self._stages.items():
+            metric = f"{name};dur={ms:.1f}"
+            if count > 1:
+                metric += f';desc="{count}x"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(metrics)
+
+
+def start_request_timing():
+    """
+    New collector for the current request, returns it with the token to reset it
+    """
+    timing = RequestTiming()
+    return timing, _request_timing.set(timing)
+
+
+def end_request_timing(timing, token):
+    timing.closed = True
+    _request_timing.reset(token)
+
+
+def get_request_timing():
+    return _request_timing.get()
+
+
+def record_timing(name, duration_ms):
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.add(name, duration_ms)
+
+
+def create_background_task(coro):
+    """
+    Task for work that outlives the request starting it (writers, analysis runs),
+    run in an empty context so its stages and queries are not counted to that request
+    """
+    # create_task(context=...) needs Python 3.11, a task copies the context it is created in
+    return contextvars.Context().run(asyncio.create_task, coro)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block to the current request's stage name, no-op outside a request
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from services.llm import track_llm_failures
+from services.request_timing import timed
+from services.metrics import record_cache_lookup, SECTION_LATENCY, SECTION_FAILURES
+from utils.scorer.linkedin_score import RULES_VERSION
+from utils.scorer.sections import get_section_input
+from logger import get_logger
+
+logger = get_logger("SectionCache")
+
+SECTION_CACHE_MAX_BYTES = int(os.getenv("SECTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class SectionCache:
+    """
+    LRU cache of section results bounded by the approximate size of the stored results
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, count_miss=True):
+        """
+        Cached result of key, count_miss=False for a lookup that is followed by a counted one on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            if count_miss:
+                record_cache_lookup("section", False)
+                self.misses += 1
+            return None
+        record_cache_lookup("section", True)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers mutate results (formatters replace the review), hand out a copy
+        return json.loads(entry[0])
+
+    def set(self, key, value):
+        encoded = json.dumps(value)
+        size = len(encoded) + len(key)
+        if size > self.max_bytes:
+            return
+
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self._bytes -= old_entry[1]
+
+        self._entries[key] = (encoded, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# One cache per process shared by the stream endpoint, the batch endpoint, ranking and the bulk scorer
+section_cache = SectionCache(SECTION_CACHE_MAX_BYTES)
+
+
+def get_section_cache_key(section_config, data):
+    """
+    (section name, rules version, hash of the canonical section input) as one string
+    """
+    section_input = get_section_input(section_config, data)
+    canonical = json.dumps(section_input, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{section_config['name']}:{RULES_VERSION}:{digest}"
+
+
+async def run_section(section_config, data):
+    """
+    Score one section, reusing the cached result for an identical section input.
+    Results produced while an LLM call failed are fallbacks and are not cached.
+    """
+    key = get_section_cache_key(section_config, data)
+    cached = section_cache.get(key)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    try:
+        with track_llm_failures() as failures, timed(f"section-{section_config['name']}"):
+            result = await section_config["scorer"](data)
+    except Exception:
+        SECTION_FAILURES.labels(section=section_config["name"]).inc()
+        raise
+    finally:
+        SECTION_LATENCY.labels(section=section_config["name"]).observe(time.perf_counter() - started)
+
+    if failures:
+        logger.info("Not caching %s result, %d LLM call(s) failed", section_config["name"], len(failures))
+    else:
+        section_cache.set(key, result)
+    return result
@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+from utils.scorer.sections import SECTIONS_CONFIG
+from services.section_cache import run_section
+from logger import get_logger
+
+logger = get_logger("SectionScheduler")
+
+# Lower runs first, LLM sections are the critical path so they are started before rule sections
+COST_PRIORITY = {"llm": 0, "cpu": 1}
+
+
+def _get_execution_plan(sections):
+    """
+    Validate the section dependencies and return {name: set of unfinished dependencies}
+    """
+    names = {section_config["name"] for section_config in sections}
+    pending = {}
+    for section_config in sections:
+        missing = [dep for dep in section_config["depends_on"] if dep not in names]
+        if missing:
+            raise ValueError(f"Section {section_config['name']} depends on {missing} which are not scheduled")
+        pending[section_config["name"]] = set(section_config["depends_on"])
+
+    # Kahn's algorithm, only to reject cycles before anything runs
+    remaining = {name: set(deps) for name, deps in pending.items()}
+    ready = [name for name, deps in remaining.items() if not deps]
+    visited = 0
+    while ready:
+        name = ready.pop()
+        visited += 1
+        for other, deps in remaining.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps:
+                    ready.append(other)
+    if visited != len(sections):
+        raise ValueError("Section dependencies contain a cycle")
+
+    return pending
+
+
+async def run_sections_dag(data, sections=None, runner=run_section):
+    """
+    Score sections as a dependency graph and yield one node at a time in completion order.
+
+    Every ready section is started immediately, LLM sections first. Each yielded
+    item is a dict with the section config, its result (or error) and timings:
+        - ready_ms: when its dependencies finished, relative to the start of the run
+        - start_ms: when the scorer started
+        - duration_ms: how long the scorer took
+    """
+    sections = SECTIONS_CONFIG if sections is None else sections
+    section_configs = {section_config["name"]: section_config for section_config in sections}
+    order = {section_config["name"]: index for index, section_config in enumerate(sections)}
+    pending = _get_execution_plan(sections)
+
+    run_started = time.perf_counter()
+    ready_at = {}
+    running = {}
+
+    def elapsed_ms(moment):
+        return round((moment - run_started) * 1000, 2)
+
+    async def run_node(section_config):
+        started = time.perf_counter()
+        try:
+            result = await runner(section_config, data)
+            error = None
+        except Exception as e:
+            result = None
+            error = str(e)
+        finished = time.perf_counter()
+        return {
+            "section": section_config,
+            "result": result,
+            "error": error,
+            "timing": {
+                "ready_ms": elapsed_ms(ready_at[section_config["name"]]),
+                "start_ms": elapsed_ms(started),
+                "duration_ms": round((finished - started) * 1000, 2)
+            }
+        }
+
+    def start_ready_nodes():
+        ready = [name for name, deps in pending.items() if not deps and name not in running]
+        ready.sort(key=lambda name: (COST_PRIORITY.get(section_configs[name]["cost"], 1), order[name]))
+        now = time.perf_counter()
+        for name in ready:
+            ready_at[name] = now
+            running[name] = asyncio.ensure_future(run_node(section_configs[name]))
+
+    def complete(name, node_failed):
+        """
+        Remove a finished node from the graph, return the dependents that can no longer run
+        """
+        del pending[name]
+        skipped = []
+        for other, deps in list(pending.items()):
+            if name in deps:
+                deps.discard(name)
+                if node_failed and other in pending:
+                    skipped.append(other)
+                    skipped.extend(complete(other, True))
+        return skipped
+
+    start_ready_nodes()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running.values(), return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: order[task.result()["section"]["name"]]):
+                node = task.result()
+                name = node["section"]["name"]
+                del running[name]
+                skipped = complete(name, node["error"] is not None)
+                yield node
+
+                for skipped_name in skipped:
+                    # A failed dependency fails its dependents without running them
+                    yield {
+                        "section": section_configs[skipped_name],
+                        "result": None,
+                        "error": "Skipped because a dependency failed",
+                        "timing": {"ready_ms": None, "start_ms": None, "duration_ms": 0}
+                    }
+            start_ready_nodes()
+    finally:
+        for task in running.values():
+            task.cancel()
+
+    logger.info("Scored %d sections in %.2f ms", len(sections), (time.perf_counter() - run_started) * 1000)
+
+
+async def run_sections(data, sections=None, runner=run_section):
+    """
+    Run the section graph to completion and return ({name: result}, {name: error}, {name: timing})
+    """
+    results = {}
+    errors = {}
+    timings = {}
+    async for node in run_sections_dag(data, sections, runner):
+        name = node["section"]["name"]
+        timings[name] = node["timing"]
+        if node["error"] is not None:
+            errors[name] = node["error"]
+        else:
+            results[name] = node["result"]
+    return results, errors, timings
+
+
+class SectionsRun:
+    """
+    Runs the section graph in its own task so the work can outlive a consumer
+    that stops early, e.g. at a deadline.
+    """
+
+    def __init__(self, data, sections=None, runner=run_section):
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+        self.finished = False
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._produce(data, sections, runner))
+
+    async def _produce(self, data, sections, runner):
+        try:
+            async for node in run_sections_dag(data, sections, runner):
+                self._queue.put_nowait(node)
+        finally:
+            self._queue.put_nowait(None)
+
+    async def nodes(self, deadline=None):
+        """
+        Yield finished nodes until the run is complete or the loop time reaches deadline
+        """
+        loop = asyncio.get_running_loop()
+        while not self.finished:
+            timeout = None if deadline is None else max(0, deadline - loop.time())
+            try:
+                node = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return
+            if node is None:
+                self.finished = True
+                return
+
+            name = node["section"]["name"]
+            self.timings[name] = node["timing"]
+            if node["error"] is not None:
+                self.errors[name] = node["error"]
+            else:
+                self.results[name] = node["result"]
+            yield node
+
+    async def wait(self):
+        """
+        Consume the remaining nodes and return the results of every section
+        """
+        async for _ in self.nodes():
+            pass
+        return self.results
+
+    def cancel(self):
+        self._task.cancel()
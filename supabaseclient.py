@@ -1,24 +1,136 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
+from logger import get_logger
+from services.metrics import record_cache_lookup
 
 load_dotenv()
 
+logger = get_logger("SupabaseClient")
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON = os.getenv("SUPABASE_ANON")  # Public key, safe to expose
 SUPABASE_SERVICE_ROLE = os.getenv("SUPABASE_KEY")  # Private key (⚠️ server-side only)
 
+SUPABASE_USER_CLIENT_POOL_SIZE = int(os.getenv("SUPABASE_USER_CLIENT_POOL_SIZE", "256"))
+SUPABASE_USER_CLIENT_TTL_SECONDS = int(os.getenv("SUPABASE_USER_CLIENT_TTL_SECONDS", "900"))
+
 # Service role client (use only for admin/secure backend tasks)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE)
 
 # Public client (anon key, safe for user sessions)
 supabase_public: Client = create_client(SUPABASE_URL, SUPABASE_ANON)
 
-def get_user_client(access_token: str, refresh_token: str) -> Client:
+
+def get_session_key(claims: dict, access_token: str) -> str:
+    """
+    User and Supabase session of verified token claims, stable across token refreshes
+    """
+    session_id = claims.get("session_id") or hashlib.sha256(access_token.encode()).hexdigest()
+    return f"{claims['sub']}:{session_id}"
+
+
+def _close_client(client: Client):
+    try:
+        client.auth.close()
+    except Exception as e:
+        logger.warning("Could not close Supabase user client: %s", e)
+
+
+class UserClientPool:
+    """
+    LRU of Supabase clients authenticated as a user, keyed by the verified user and
+    session. A client unused for the TTL is evicted and closed. Clients do not run
+    refresh timers, an expired access token is refreshed when the client is next used.
+    Callers serialize the use of a session's client (auth_gateway.user_client).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._clients = OrderedDict()
+        # Called from the auth gateway's threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self, key):
+        client, _, _ = self._clients.pop(key)
+        self.evictions += 1
+        _close_client(client)
+
+    def _evict_expired(self, now):
+        while self._clients:
+            key, (_, last_used, _) = next(iter(self._clients.items()))
+            if now - last_used < self.ttl:
+                break
+            self._evict(key)
+
+    def get(self, claims: dict, access_token: str, refresh_token: str) -> Client:
+        key = get_session_key(claims, access_token)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], now, access_token)
+                self._clients.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache_lookup("supabase_user_client", entry is not None)
+
+        if entry is not None:
+            client, _, applied_access_token = entry
+            if access_token != applied_access_token:
+                # The frontend refreshed the session, its refresh token was not used yet.
+                # Same tokens as last time: the client's session is current or it refreshed
+                # itself, replaying the old refresh token would be rejected as reused.
+                client.auth.set_session(access_token, refresh_token)
+            return client
+
+        client = create_client(
+            SUPABASE_URL,
+            SUPABASE_ANON,
+            options=ClientOptions(auto_refresh_token=False, persist_session=False)
+        )
+        client.auth.set_session(access_token, refresh_token)
+        with self._lock:
+            if key in self._clients:
+                # Evicted and recreated by another request at the same time, keep the first
+                _close_client(client)
+                return self._clients[key][0]
+            self._clients[key] = (client, now, access_token)
+            while len(self._clients) > self.max_size:
+                self._evict(next(iter(self._clients)))
+        return client
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "clients": len(self._clients),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+user_client_pool = UserClientPool(SUPABASE_USER_CLIENT_POOL_SIZE, SUPABASE_USER_CLIENT_TTL_SECONDS)
+
+
+def get_user_client(claims: dict, access_token: str, refresh_token: str) -> Client:
     """
     Create a Supabase client authenticated as a specific user.
     This uses the anon key + restores the user's session.
+    Clients are reused from the pool for later requests of the same session,
+    claims are those of the verified access token.
     """
-    client = create_client(SUPABASE_URL, SUPABASE_ANON)
-    client.auth.set_session(access_token, refresh_token)
-    return client
+    return user_client_pool.get(claims, access_token, refresh_token)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py builds its engine at import, it only connects when a test uses it
+os.environ.setdefault("SUPABASE_DB", os.getenv("TEST_DATABASE_URL") or "postgresql+asyncpg://localhost/unused")
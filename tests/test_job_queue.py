@@ -0,0 +1,46 @@
+import asyncio
+import types
+import uuid
+
+import services.job_queue as job_queue
+
+
+def _job():
+    return types.SimpleNamespace(job_id=uuid.uuid4(), attempts=1, max_attempts=3, last_error=None, options={})
+
+
+def test_worker_keeps_claiming_jobs_when_the_status_update_fails(monkeypatch):
+    jobs = [_job(), _job()]
+    claimed = []
+    all_claimed = asyncio.Event()
+
+    async def claim_job(worker_id):
+        if not jobs:
+            all_claimed.set()
+            return None
+        job = jobs.pop(0)
+        claimed.append(job.job_id)
+        return job
+
+    async def run_job(job, worker_id):
+        return {"message_type": "complete_analysis"}
+
+    async def update_owned_job(job_id, worker_id, **values):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(job_queue, "claim_job", claim_job)
+    monkeypatch.setattr(job_queue, "_run_job", run_job)
+    monkeypatch.setattr(job_queue, "_update_owned_job", update_owned_job)
+    monkeypatch.setattr(job_queue, "JOB_POLL_SECONDS", 0.01)
+
+    async def run():
+        worker = asyncio.ensure_future(job_queue._worker("test"))
+        try:
+            await asyncio.wait_for(all_claimed.wait(), 5)
+            assert not worker.done()
+        finally:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+
+    asyncio.run(run())
+    assert len(claimed) == 2
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from services.section_scheduler import run_sections, run_sections_dag
+
+
+def _section(name, cost="cpu", depends_on=()):
+    return {"name": name, "cost": cost, "depends_on": list(depends_on)}
+
+
+# profile -> headline (llm) -> summary, profile -> skills, summary also needs skills
+REGISTRY = [
+    _section("profile"),
+    _section("skills", depends_on=["profile"]),
+    _section("headline", cost="llm", depends_on=["profile"]),
+    _section("summary", depends_on=["headline", "skills"]),
+]
+
+
+def _runner(started, failing=(), delays=None):
+    async def runner(section_config, data):
+        started.append(section_config["name"])
+        await asyncio.sleep((delays or {}).get(section_config["name"], 0))
+        if section_config["name"] in failing:
+            raise ValueError(f"{section_config['name']} failed")
+        return {"score": 1, "seen": sorted(data)}
+    return runner
+
+
+async def _collect(sections, runner):
+    return [node async for node in run_sections_dag({}, sections, runner)]
+
+
+def test_sections_run_after_their_dependencies():
+    started = []
+    results, errors, _ = asyncio.run(run_sections({}, REGISTRY, _runner(started, delays={"headline": 0.02})))
+
+    assert errors == {}
+    assert set(results) == {"profile", "skills", "headline", "summary"}
+    assert started[0] == "profile"
+    assert started.index("summary") > max(started.index("headline"), started.index("skills"))
+
+
+def test_llm_sections_start_before_rule_sections():
+    started = []
+    asyncio.run(run_sections({}, REGISTRY, _runner(started)))
+
+    # skills and headline become ready together, the LLM one is started first
+    assert started[1:3] == ["headline", "skills"]
+
+
+def test_failed_dependency_skips_its_dependents():
+    started = []
+    nodes = asyncio.run(_collect(REGISTRY, _runner(started, failing={"headline"})))
+    names = [node["section"]["name"] for node in nodes]
+    by_name = {node["section"]["name"]: node for node in nodes}
+
+    assert "summary" not in started
+    assert by_name["headline"]["error"] == "headline failed"
+    assert by_name["summary"]["error"] == "Skipped because a dependency failed"
+    assert by_name["summary"]["timing"]["start_ms"] is None
+    assert by_name["skills"]["error"] is None
+    # Yielded after the failure that caused it
+    assert names.index("summary") > names.index("headline")
+
+
+def test_skips_propagate_transitively():
+    sections = [_section("a"), _section("b", depends_on=["a"]), _section("c", depends_on=["b"])]
+    started = []
+    _, errors, _ = asyncio.run(run_sections({}, sections, _runner(started, failing={"a"})))
+
+    assert started == ["a"]
+    assert set(errors) == {"a", "b", "c"}
+
+
+def test_cycle_is_rejected_before_anything_runs():
+    sections = [_section("a", depends_on=["c"]), _section("b", depends_on=["a"]), _section("c", depends_on=["b"]), _section("d")]
+    started = []
+
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_sections({}, sections, _runner(started)))
+    assert started == []
+
+
+def test_unscheduled_dependency_is_rejected():
+    with pytest.raises(ValueError, match="not scheduled"):
+        asyncio.run(run_sections({}, [_section("b", depends_on=["a"])], _runner([])))
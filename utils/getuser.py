@@ -1,19 +1,173 @@
 import jwt
 import os
-from fastapi import HTTPException
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from fastapi import HTTPException, Request
 from dotenv import load_dotenv
+from services import auth_gateway
+from services.request_timing import timed
+from services.metrics import record_cache_lookup
+from logger import get_logger
 
 load_dotenv()
 
+logger = get_logger("Auth")
 
-url = os.getenv("SUPABASE_JWT")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
 
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "600"))
+# Ask Supabase whether the session was revoked (signed out) before trusting a token
+AUTH_REVOCATION_CHECK = os.getenv("AUTH_REVOCATION_CHECK", "0") == "1"
+# How long a revocation checked token is trusted before Supabase is asked again
+AUTH_REVOCATION_TTL_SECONDS = int(os.getenv("AUTH_REVOCATION_TTL_SECONDS", "60"))
 
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
 
-def get_user_id_from_token(token: str) -> str:
+_jwks_client = None
+
+
+def _get_jwks_client():
+    global _jwks_client
+    if _jwks_client is None:
+        if not SUPABASE_URL:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        _jwks_client = jwt.PyJWKClient(
+            f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=JWKS_CACHE_SECONDS
+        )
+    return _jwks_client
+
+
+class TokenCache:
+    """
+    LRU cache of verified token claims keyed by the token hash, an entry is
+    dropped once the token expires
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            record_cache_lookup("auth_token", False)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        record_cache_lookup("auth_token", True)
+        return entry[0]
+
+    def set(self, key, claims, expires_at):
+        self._entries[key] = (claims, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+def _get_algorithm(token: str):
     try:
-        decoded = jwt.decode(token, url, algorithms=["HS256"], audience="authenticated")
-        return decoded["sub"]
+        return jwt.get_unverified_header(token).get("alg")
     except jwt.exceptions.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+
+def decode_token(token: str) -> dict:
+    """
+    Verify the token signature and expiry locally: HS256 with SUPABASE_JWT, or the
+    project's JWKS (fetched once and cached) for asymmetric signing keys
+    """
+    algorithm = _get_algorithm(token)
+    try:
+        if algorithm == "HS256":
+            if not SUPABASE_JWT_SECRET:
+                # PyJWT would fail with a non PyJWTError on a missing key
+                logger.error("SUPABASE_JWT is not set, HS256 tokens cannot be verified")
+                raise HTTPException(status_code=401, detail="Invalid token")
+            key = SUPABASE_JWT_SECRET
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        else:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return jwt.decode(token, key, algorithms=[algorithm], audience="authenticated", options={"require": ["exp", "sub"]})
+    except jwt.exceptions.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def _is_revoked(token: str) -> bool:
+    try:
+        res = await auth_gateway.get_user(token)
+    except Exception as e:
+        logger.warning("Revocation check failed: %s", e)
+        return True
+    return not res.user
+
+
+async def verify_token(token: str) -> dict:
+    """
+    Claims of a valid token, a cached token costs one hash and a dict lookup
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    if SUPABASE_JWT_SECRET and _get_algorithm(token) == "HS256":
+        claims = decode_token(token)
+    else:
+        # A JWKS refresh is a blocking HTTP request, keep it off the event loop
+        claims = await asyncio.to_thread(decode_token, token)
+    expires_at = claims["exp"]
+    if AUTH_REVOCATION_CHECK:
+        if await _is_revoked(token):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        expires_at = min(expires_at, time.time() + AUTH_REVOCATION_TTL_SECONDS)
+    token_cache.set(key, claims, expires_at)
+    return claims
+
+
+def get_bearer_token(request) -> str:
+    auth_head = request.headers.get("Authorization")
+    if not auth_head or not auth_head.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return auth_head.split(" ")[1]
+
+
+async def get_current_user_id(request: Request) -> str:
+    """
+    Dependency returning the id of the authenticated user, verified once per request
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is None:
+        with timed("auth"):
+            claims = await verify_token(get_bearer_token(request))
+        user_id = claims["sub"]
+        request.state.user_id = user_id
+    return user_id
+
+
+def get_user_id_from_token(token: str) -> str:
+    return decode_token(token)["sub"]
@@ -9,6 +9,30 @@ from schemas.linkedin_score import (
 from utils.promtps.headline import get_headline_prompt
 from utils.promtps.about import get_about_prompt
 from utils.promtps.experience import get_experience_description_prompt
+from logger import get_logger
+
+# Debug output of the scorers runs on every analysis, sample it with LOG_SAMPLE_RATES=Scorer=...
+logger = get_logger("Scorer")
+
+# Bump whenever a scorer, weight or prompt changes so cached section results are not reused
+RULES_VERSION = "1"
+
+# Weights of the LLM checks, also used to bound the best achievable score
+HEADLINE_CHECK_WEIGHTS = {
+    "Professional Identity": 3.0,
+    "Skills Integration": 3.0,
+    "Searchability & Keywords": 3.0,
+    "Formatting & Structure": 3.0
+}
+
+ABOUT_CHECK_WEIGHTS = {
+    "Professional Career Story": 3.0,
+    "Skills and Strengths": 4.0,
+    "Achievements and Impact": 4.0,
+    "Human Touch": 3.0,
+    "Call to Action": 3.0,
+    "length" : 3.0
+}
 
 async def get_headline_score(data):
 
@@ -48,12 +72,7 @@ async def get_headline_score(data):
             }]
         }
 
-    weight = {
-        "Professional Identity": 3.0,
-        "Skills Integration": 3.0,
-        "Searchability & Keywords": 3.0,
-        "Formatting & Structure": 3.0
-    }
+    weight = HEADLINE_CHECK_WEIGHTS
 
     score = 0
     review = []
@@ -71,28 +90,9 @@ async def get_headline_score(data):
             score += (weight[check["check_type"]])
 
     # Manual length check
-    length_passed = False
-    length_message = ""
-    if len(headline) < 70:
-        score += 1.5
-        length_passed = False
-        length_message = "Headline length is length too small lacks the clarity"
-    elif len(headline) <= 150:
-        score += 3.0
-        length_passed = True
-        length_message = "Headline is Length Optimal"
-    else:
-        score += 2.0
-        length_passed = False
-        length_message = "Headline length is too long and needs to be shortened"
-    
-    review.append({
-        "check_type": "Length Optimization",
-        "passed": length_passed,
-        "message": length_message
-    })
-
-  
+    length_score, length_review = _headline_length_check(headline)
+    score += length_score
+    review.append(length_review)
 
     return {
         "score": score,
@@ -100,6 +100,30 @@ async def get_headline_score(data):
     }
 
 
+def _headline_length_check(headline):
+    """
+    Rule based length check of the headline, returns (score, review item)
+    """
+    if len(headline) < 70:
+        return 1.5, {
+            "check_type": "Length Optimization",
+            "passed": False,
+            "message": "Headline length is length too small lacks the clarity"
+        }
+    elif len(headline) <= 150:
+        return 3.0, {
+            "check_type": "Length Optimization",
+            "passed": True,
+            "message": "Headline is Length Optimal"
+        }
+    else:
+        return 2.0, {
+            "check_type": "Length Optimization",
+            "passed": False,
+            "message": "Headline length is too long and needs to be shortened"
+        }
+
+
 
 async def get_about_score(data):
 
@@ -138,14 +162,7 @@ async def get_about_score(data):
             }]
         }
 
-    weights = {
-        "Professional Career Story": 3.0,
-        "Skills and Strengths": 4.0,
-        "Achievements and Impact": 4.0,
-        "Human Touch": 3.0,
-        "Call to Action": 3.0,
-        "length" : 3.0
-    }
+    weights = ABOUT_CHECK_WEIGHTS
     
     score = 0
     review = []
@@ -163,6 +180,20 @@ async def get_about_score(data):
             score += (weights.get(check["check_type"],0))
 
     # Manual length check
+    length_score, length_review = _about_length_check(about)
+    score += length_score
+    review.append(length_review)
+
+    return {
+        "score": score,
+        "review": review
+    }
+
+
+def _about_length_check(about):
+    """
+    Rule based length check of the about text, returns (score, review item)
+    """
     about_length = len(about) if about else 0
     length_passed = False
     length_message = ""
@@ -175,23 +206,16 @@ async def get_about_score(data):
     elif about_length < 400:
         length_passed = False
         length_message = "About section length is below 400 characters."
-        length_score = (weights["length"]/2)
+        length_score = (ABOUT_CHECK_WEIGHTS["length"]/2)
     else:
         length_passed = True
         length_message = "About section length is 400 characters or more."
-        length_score = weights["length"]
-
-    score += length_score
+        length_score = ABOUT_CHECK_WEIGHTS["length"]
 
-    review.append({
+    return length_score, {
         "check_type": "Length Optimization",
         "passed": length_passed,
         "message": length_message
-    })
-
-    return {
-        "score": score,
-        "review": review
     }
 
 
@@ -480,6 +504,47 @@ def _check_name_format(name):
 
 
 
+EXPERIENCE_FIELDS = {
+    "title": {"weight": 3, "name": "Title"},
+    "from": {"weight": 2, "name": "Start date"},
+    "to": {"weight": 2, "name": "End date"},
+    "duration": {"weight": 2, "name": "Duration"},
+    "location": {"weight": 3, "name": "Location"},
+    "employment_type": {"weight": 3, "name": "Employment Type"},
+    "skills_used": {"weight": 2, "name": "Skills Used"},
+    "description": {"weight": 3, "name": "Description"}
+}
+
+# Description values that are scored as empty without asking the LLM
+EMPTY_DESCRIPTIONS = ["not specified", "n/a", "na", ""]
+
+
+def _get_experience_role_rule_score(role):
+    """
+    Score the field-presence part of one experience role (every field except the description)
+    Returns (score, missing field names)
+    """
+    role_score = 0
+    role_missing_fields = []
+    for field, field_info in EXPERIENCE_FIELDS.items():
+        if field == "description":
+            continue
+        field_value = role.get(field, "")
+        if field == "skills_used":
+            if isinstance(field_value, list) and len(field_value) > 0:
+                role_score += field_info["weight"]
+            elif isinstance(field_value, str) and field_value.strip():
+                role_score += field_info["weight"]
+            else:
+                role_missing_fields.append(field_info["name"])
+        else:
+            if str(field_value).strip():
+                role_score += field_info["weight"]
+            else:
+                role_missing_fields.append(field_info["name"])
+    return role_score, role_missing_fields
+
+
 async def get_experience_score(data):
     """
     Evaluate experience section and return score out of 10 points (average across all experience entries)
@@ -494,16 +559,7 @@ async def get_experience_score(data):
     - skills_used (weight: 2)
     - description (weight: 3, analyzed by LLM for role clarity and impact)
     """
-    all_fields = {
-        "title": {"weight": 3, "name": "Title"},
-        "from": {"weight": 2, "name": "Start date"},
-        "to": {"weight": 2, "name": "End date"},
-        "duration": {"weight": 2, "name": "Duration"},
-        "location": {"weight": 3, "name": "Location"},
-        "employment_type": {"weight": 3, "name": "Employment Type"},
-        "skills_used": {"weight": 2, "name": "Skills Used"},
-        "description": {"weight": 3, "name": "Description"}
-    }
+    all_fields = EXPERIENCE_FIELDS
 
     experience_list = data.get("experience", [])
     if not experience_list:
@@ -547,8 +603,7 @@ async def get_experience_score(data):
             continue
 
         for role_index, role in enumerate(roles_data):
-            role_score = 0
-            role_missing_fields = []
+            role_score, role_missing_fields = _get_experience_role_rule_score(role)
             role_title = role.get("title", "")
             if len(roles_data) > 1 and role_title:
                 role_identifier = f"role '{role_title}' at {company_name}"
@@ -557,70 +612,57 @@ async def get_experience_score(data):
             else:
                 role_identifier = f"role #{role_index + 1} at {company_name}" if len(roles_data) > 1 else f"role at {company_name}"
 
-            for field, field_info in all_fields.items():
-                field_value = role.get(field, "")
-
-                if field == "description":
-                    if field_value and str(field_value).strip():
-                        try:
-                            role_title_for_analysis = role.get("title", "Unknown Role")
-                            system_message, prompt = get_experience_description_prompt(
-                                field_value, role_title_for_analysis, company_name
-                            )
-                            
-                            # Time tracking for LLM call
-                            start_time = time.time()
-                            if field_value.lower() not in ["not specified", "n/a", "na", ""]:
-
-                              
-                                analysis_result = await call_llm(
-                                    system_message=system_message,
-                                    prompt=prompt,
-                                    response_model=LinkedinExperienceDescriptionResponse
-                                )
-                            else:
-                                analysis_result = {
-                                    "analysis": {
-                                        "role_clarity": False,
-                                        "impact_demonstrated": False
-                                    }
-                                }
-                            end_time = time.time()
-                            print(f"LLM call time for get_experience_description_score: {end_time - start_time:.2f} seconds")
-
-                            analysis_data = analysis_result
-                            analysis = analysis_data["analysis"]
-
-                            description_score = 0
-                            if analysis.get("role_clarity"):
-                                description_score += field_info["weight"] / 2
-                            if analysis.get("impact_demonstrated"):
-                                description_score += field_info["weight"] / 2
-                            role_score += description_score
-
-                            missing_criteria = []
-                            if not analysis.get("role_clarity"):
-                                missing_criteria.append("role clarity")
-                            if not analysis.get("impact_demonstrated"):
-                                missing_criteria.append("impact demonstration")
-                            if missing_criteria:
-                                role_missing_fields.append(f"Description lacks {' and '.join(missing_criteria)}")
-                        except Exception:
-                            role_missing_fields.append("Description analysis failed")
-                    else:
-                        role_missing_fields.append(field_info["name"])
-                elif field == "skills_used":
-                    if isinstance(field_value, list) and len(field_value) > 0:
-                        role_score += field_info["weight"]
-                    elif isinstance(field_value, str) and field_value.strip():
-                        role_score += field_info["weight"]
+            # Description is analyzed by the LLM for role clarity and impact
+            field_info = all_fields["description"]
+            field_value = role.get("description", "")
+            if field_value and str(field_value).strip():
+                try:
+                    role_title_for_analysis = role.get("title", "Unknown Role")
+                    system_message, prompt = get_experience_description_prompt(
+                        field_value, role_title_for_analysis, company_name
+                    )
+                    
+                    # Time tracking for LLM call
+                    start_time = time.time()
+                    if field_value.lower() not in EMPTY_DESCRIPTIONS:
+
+                      
+                        analysis_result = await call_llm(
+                            system_message=system_message,
+                            prompt=prompt,
+                            response_model=LinkedinExperienceDescriptionResponse
+                        )
                     else:
-                        role_missing_fields.append(field_info["name"])
-                else:
-                    if str(field_value).strip():
-                        role_score += field_info["weight"]
-                    else:
-                        role_missing_fields.append(field_info["name"])
+                        analysis_result = {
+                            "analysis": {
+                                "role_clarity": False,
+                                "impact_demonstrated": False
+                            }
+                        }
+                    end_time = time.time()
+                    logger.debug("LLM call time for get_experience_description_score: %.2f seconds", end_time - start_time)
+
+                    analysis_data = analysis_result
+                    analysis = analysis_data["analysis"]
+
+                    description_score = 0
+                    if analysis.get("role_clarity"):
+                        description_score += field_info["weight"] / 2
+                    if analysis.get("impact_demonstrated"):
+                        description_score += field_info["weight"] / 2
+                    role_score += description_score
+
+                    missing_criteria = []
+                    if not analysis.get("role_clarity"):
+                        missing_criteria.append("role clarity")
+                    if not analysis.get("impact_demonstrated"):
+                        missing_criteria.append("impact demonstration")
+                    if missing_criteria:
+                        role_missing_fields.append(f"Description lacks {' and '.join(missing_criteria)}")
+                except Exception:
+                    role_missing_fields.append("Description analysis failed")
+            else:
+                role_missing_fields.append(field_info["name"])
 
             experience_scores.append(role_score)
             if role_missing_fields:
@@ -739,8 +781,7 @@ async def get_project_score(data):
     """
     
     projects_list = data.get("projects", [])
-    print(f"DEBUG: projects_list = {projects_list}")
-    print(f"DEBUG: projects_list length = {len(projects_list) if projects_list else 0}")
+    logger.debug("projects_list length = %d", len(projects_list) if projects_list else 0)
     
     if not projects_list:
         return {
@@ -919,45 +960,30 @@ async def _evaluate_project_description_with_llm(title, description):
             return {"score": 1, "suggestion": "Expand the description with technical details, technologies used, and project outcomes."}
 
 
-async def get_skill_score(data):
-    """
-    Evaluate skills section with flexible weightage system
-    
-    Weightage breakdown (adjustable):
-    - Skill count: 5 points
-    - Endorsements: 3 points
-    - Skill relevance: 2 points
-    Total: 10 points
-    """
-    
-    # Flexible weightage system - easily adjustable
-    weights = {
-        "skill_count": 5,
-        "endorsements": 3,
-        "skill_relevance": 2
-    }
-    
-    skills_list = data.get("skills", [])
-    if not skills_list:
-        return {
-            "score": 0,
-            "review": [{
-                "check_type": "Skills Section",
-                "passed": False,
-                "message": "Skills section is missing"
-            }]
-        }
-    
-    # Get headline for relevance checking
+SKILL_WEIGHTS = {
+    "skill_count": 5,
+    "endorsements": 3,
+    "skill_relevance": 2
+}
+
+
+def _get_skill_headline(data):
     headline = ""
     if "profile" in data:
         headline = data["profile"].get("headline", "")
     elif "headline" in data:
         headline = data.get("headline", "")
-    
+    return headline
+
+
+def _get_skill_rule_score(skills_list):
+    """
+    Score the skill count and endorsement checks, returns (score, review)
+    """
+    weights = SKILL_WEIGHTS
     review = []
     skill_score = 0
-    
+
     # 1. Check total number of skills
     total_skills = len(skills_list)
     if total_skills >= 15:
@@ -988,7 +1014,7 @@ async def get_skill_score(data):
         endorsement_percentage = endorsement_score / total_skills
         endorsement_points = endorsement_percentage * weights["endorsements"]
         skill_score += endorsement_points
-        print(f"DEBUG: endorsement_score={endorsement_score}, endorsement_percentage={endorsement_percentage}, endorsement_points={endorsement_points}")
+        logger.debug("endorsement_score=%s, endorsement_percentage=%s, endorsement_points=%s", endorsement_score, endorsement_percentage, endorsement_points)
         
         # Add to review if endorsements are low
         if endorsement_percentage < 0.5:  # Less than 50% of skills have good endorsements
@@ -1000,6 +1026,40 @@ async def get_skill_score(data):
                 "passed": False,
                 "message": f"These skills ({skill_names}) have less endorsements, try to ask peers to endorse skills"
             })
+
+    return skill_score, review
+
+
+async def get_skill_score(data):
+    """
+    Evaluate skills section with flexible weightage system
+    
+    Weightage breakdown (adjustable):
+    - Skill count: 5 points
+    - Endorsements: 3 points
+    - Skill relevance: 2 points
+    Total: 10 points
+    """
+    
+    # Flexible weightage system - easily adjustable
+    weights = SKILL_WEIGHTS
+    
+    skills_list = data.get("skills", [])
+    if not skills_list:
+        return {
+            "score": 0,
+            "review": [{
+                "check_type": "Skills Section",
+                "passed": False,
+                "message": "Skills section is missing"
+            }]
+        }
+    
+    # Get headline for relevance checking
+    headline = _get_skill_headline(data)
+    
+    # 1. and 2. Skill count and endorsement levels
+    skill_score, review = _get_skill_rule_score(skills_list)
     
     # 3. Check skills relevance to headline using LLM
     if headline:
@@ -0,0 +1,328 @@
+from utils.scorer.linkedin_score import get_profile_score
+from utils.scorer.linkedin_score import get_headline_score
+from utils.scorer.linkedin_score import get_about_score
+from utils.scorer.linkedin_score import get_profile_content_score
+from utils.scorer.linkedin_score import get_experience_score
+from utils.scorer.linkedin_score import get_education_score
+from utils.scorer.linkedin_score import get_project_score
+from utils.scorer.linkedin_score import get_skill_score
+from utils.scorer.linkedin_score import get_certification_score
+from utils.scorer.linkedin_score import get_volunteer_section_score
+from utils.scorer.linkedin_score import get_interest_section_score
+from utils.scorer.linkedin_score import get_language_score
+from utils.scorer.linkedin_score import get_banner_score
+from utils.scorer.linkedin_score import get_linkedin_url_score
+from utils.scorer.linkedin_score import get_recommendation_score
+from utils.scorer.linkedin_score import get_activity_score
+from utils.linkedin_format.linkedin_format import get_headline_format
+from utils.linkedin_format.linkedin_format import get_about_format
+from utils.linkedin_format.linkedin_format import get_experience_format
+from utils.linkedin_format.linkedin_format import get_education_format
+from utils.linkedin_format.linkedin_format import get_project_format
+from utils.linkedin_format.linkedin_format import get_skill_format
+from utils.linkedin_format.linkedin_format import get_certification_format
+from utils.linkedin_format.linkedin_format import get_volunteer_format
+from utils.linkedin_format.linkedin_format import get_interest_format
+from utils.linkedin_format.linkedin_format import get_language_format
+from utils.linkedin_format.linkedin_format import get_banner_format
+from utils.linkedin_format.linkedin_format import get_profile_format
+from utils.linkedin_format.linkedin_format import get_linkedin_url_format
+from utils.linkedin_format.linkedin_format import get_recommendation_format
+from utils.linkedin_format.linkedin_format import get_profile_content_format
+from utils.linkedin_format.linkedin_format import get_activity_format
+
+
+# Section registry, shared by the checker routes, the scheduler and the bulk scorer
+# "report_key"  value of "section" in the formatted result, used to find the section in a stored report
+# "inputs"      dotted paths of the profile data a scorer reads, its result only depends on them
+# "cost"        "llm" when the scorer may call the LLM, "cpu" for pure rule sections
+# "feeds_total" whether the section score is added to the profile total
+# "depends_on"  sections whose result must be ready before this one runs. Scorers only
+#               read the profile data, so no section declares one yet and all run at once
+SECTIONS_CONFIG = [
+    {
+        "name": "profile_content",
+        "scorer": get_profile_content_score,
+        "formatter": get_profile_content_format,
+        "display_name": "Profile Content",
+        "report_key": "profile",
+        "inputs": ["profile.connections", "profile.followers", "profile.name", "profile.location", "profile.openToWork"],
+        "cost": "cpu",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "profile_pic",
+        "scorer": get_profile_score,
+        "formatter": get_profile_format,
+        "display_name": "Profile Picture",
+        "report_key": "profile_pic",
+        "inputs": ["profile.profilePic"],
+        "cost": "cpu",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "banner",
+        "scorer": get_banner_score,
+        "formatter": get_banner_format,
+        "display_name": "Banner",
+        "report_key": "profile_bg_pic",
+        "inputs": ["profile.banner"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "headline",
+        "scorer": get_headline_score,
+        "formatter": get_headline_format,
+        "display_name": "Headline",
+        "report_key": "headline",
+        "inputs": ["profile.headline"],
+        "cost": "llm",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "about",
+        "scorer": get_about_score,
+        "formatter": get_about_format,
+        "display_name": "About Section",
+        "report_key": "about",
+        "inputs": ["about.text"],
+        "cost": "llm",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "experience",
+        "scorer": get_experience_score,
+        "formatter": get_experience_format,
+        "display_name": "Experience",
+        "report_key": "experience",
+        "inputs": ["experience"],
+        "cost": "llm",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "education",
+        "scorer": get_education_score,
+        "formatter": get_education_format,
+        "display_name": "Education",
+        "report_key": "education",
+        "inputs": ["education"],
+        "cost": "cpu",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "projects",
+        "scorer": get_project_score,
+        "formatter": get_project_format,
+        "display_name": "Projects",
+        "report_key": "projects",
+        "inputs": ["projects"],
+        "cost": "llm",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "skills",
+        "scorer": get_skill_score,
+        "formatter": get_skill_format,
+        "display_name": "Skills",
+        "report_key": "skills",
+        "inputs": ["skills", "profile.headline", "headline"],
+        "cost": "llm",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "certifications",
+        "scorer": get_certification_score,
+        "formatter": get_certification_format,
+        "display_name": "Certifications",
+        "report_key": "certificates",
+        "inputs": ["certificates"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "volunteering",
+        "scorer": get_volunteer_section_score,
+        "formatter": get_volunteer_format,
+        "display_name": "Volunteering",
+        "report_key": "volunteering",
+        "inputs": ["volunteering"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "interests",
+        "scorer": get_interest_section_score,
+        "formatter": get_interest_format,
+        "display_name": "Interests",
+        "report_key": "interests",
+        "inputs": ["interests"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "languages",
+        "scorer": get_language_score,
+        "formatter": get_language_format,
+        "display_name": "Languages",
+        "report_key": "languages",
+        "inputs": ["languages"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "linkedin_url",
+        "scorer": get_linkedin_url_score,
+        "formatter": get_linkedin_url_format,
+        "display_name": "LinkedIn URL",
+        "report_key": "linkedin_url",
+        "inputs": ["profile.linkedin_url"],
+        "cost": "cpu",
+        "feeds_total": True,
+        "depends_on": []
+    },
+    {
+        "name": "recommendations",
+        "scorer": get_recommendation_score,
+        "formatter": get_recommendation_format,
+        "display_name": "Recommendations",
+        "report_key": "recommendations",
+        "inputs": ["recommendations"],
+        "cost": "llm",
+        "feeds_total": False,
+        "depends_on": []
+    },
+    {
+        "name": "activity",
+        "scorer": get_activity_score,
+        "formatter": get_activity_format,
+        "display_name": "Activity",
+        "report_key": "activity",
+        "inputs": ["activity"],
+        "cost": "cpu",
+        "feeds_total": False,
+        "depends_on": []
+    }
+]
+
+def get_rule_sections():
+    """
+    Sections that never touch the LLM and are safe to run in a worker process
+    """
+    return [section for section in SECTIONS_CONFIG if section["cost"] == "cpu"]
+
+
+def get_llm_sections():
+    """
+    Sections whose scorer calls the LLM
+    """
+    return [section for section in SECTIONS_CONFIG if section["cost"] == "llm"]
+
+
+_MISSING = "__missing__"
+
+
+def get_section_input(section_config, data):
+    """
+    Extract the part of the profile data a section scorer reads
+    """
+    section_input = {}
+    for path in section_config["inputs"]:
+        value = data
+        for key in path.split("."):
+            if isinstance(value, dict) and key in value:
+                value = value[key]
+            else:
+                value = f"{_MISSING}:{key}"
+                break
+        section_input[path] = value
+    return section_input
+
+
+def get_section_config(name):
+    for section_config in SECTIONS_CONFIG:
+        if section_config["name"] == name:
+            return section_config
+    raise KeyError(f"Unknown section: {name}")
+
+
+def get_sections_subset(names):
+    """
+    Configs of the requested section names plus the sections they depend on, in registry order
+    """
+    unknown = [name for name in names if name not in {section_config["name"] for section_config in SECTIONS_CONFIG}]
+    if unknown:
+        raise KeyError(f"Unknown sections: {', '.join(unknown)}")
+
+    selected = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        pending.extend(get_section_config(name)["depends_on"])
+    return [section_config for section_config in SECTIONS_CONFIG if section_config["name"] in selected]
+
+
+def build_report(section_results, sections=None, stored_report=None):
+    """
+    Build the complete_analysis report from raw section results keyed by section name.
+    Sections without a result are taken from stored_report when it has them, so a
+    subset of sections can be re-scored and merged, otherwise they are left out.
+    """
+    sections = SECTIONS_CONFIG if sections is None else sections
+    stored_sections = {}
+    stored_scores = {}
+    if stored_report:
+        stored_sections = {formatted.get("section"): formatted for formatted in stored_report.get("sections", [])}
+        stored_scores = stored_report.get("section_scores", {})
+
+    total_score = 0
+    formatted_sections = []
+    section_scores = {}
+    provisional = False
+    for section_config in sections:
+        name = section_config["name"]
+        score_result = section_results.get(name)
+        if score_result is not None:
+            formatted_result = section_config["formatter"](score_result)
+            if score_result.get("provisional"):
+                formatted_result["provisional"] = True
+            section_score = score_result.get("score", 0)
+        elif name in stored_scores and section_config["report_key"] in stored_sections:
+            formatted_result = stored_sections[section_config["report_key"]]
+            section_score = stored_scores[name]
+        else:
+            continue
+
+        if formatted_result.get("provisional"):
+            provisional = True
+        section_scores[name] = section_score
+        if section_config["feeds_total"]:
+            total_score += section_score
+        formatted_sections.append(formatted_result)
+
+    report = {
+        "message_type": "complete_analysis",
+        "score": round(total_score),
+        "sections": formatted_sections,
+        # Raw scores, the formatted ones are scaled and rounded and cannot be summed again
+        "section_scores": section_scores
+    }
+    if provisional:
+        report["provisional"] = True
+    return report
@@ -0,0 +1,233 @@
+"""
+Rule-based parts of the LLM sections.
+
+Each function returns the part of a section score that can be computed
+without the LLM, the best score the section can still reach once the LLM
+checks are done, and how many LLM calls the full scorer would make.
+"""
+from utils.scorer.linkedin_score import (
+    HEADLINE_CHECK_WEIGHTS,
+    ABOUT_CHECK_WEIGHTS,
+    EXPERIENCE_FIELDS,
+    EMPTY_DESCRIPTIONS,
+    SKILL_WEIGHTS,
+    _headline_length_check,
+    _about_length_check,
+    _get_experience_role_rule_score,
+    _get_skill_headline,
+    _get_skill_rule_score,
+)
+
+
+def _rule_part(score, review, max_score, llm_calls):
+    return {
+        "score": score,
+        "review": review,
+        "max_score": max_score,
+        "llm_calls": llm_calls
+    }
+
+
+def get_headline_rule_part(data):
+    headline = data.get('profile', {}).get('headline', '')
+    if not headline:
+        return _rule_part(0, [], 0, 0)
+
+    length_score, length_review = _headline_length_check(headline)
+    return _rule_part(length_score, [length_review], length_score + sum(HEADLINE_CHECK_WEIGHTS.values()), 1)
+
+
+def get_about_rule_part(data):
+    about = data.get("about", {}).get("text", "")
+    if not about:
+        return _rule_part(0, [], 0, 0)
+
+    length_score, length_review = _about_length_check(about)
+    llm_max = sum(weight for check_type, weight in ABOUT_CHECK_WEIGHTS.items() if check_type != "length")
+    return _rule_part(length_score, [length_review], length_score + llm_max, 1)
+
+
+def get_experience_rule_part(data):
+    """
+    Field presence of every role, the description adds at most its weight when the LLM runs
+    """
+    experience_list = data.get("experience", [])
+    rule_scores = []
+    max_scores = []
+    review = []
+    llm_calls = 0
+
+    for experience in experience_list:
+        company_name = experience.get("company", "")
+        if not company_name or not company_name.strip():
+            continue
+
+        roles_data = []
+        if "roles" in experience:
+            roles_data = experience["roles"]
+        elif "role" in experience:
+            roles_data = [experience["role"]]
+
+        for role in roles_data:
+            role_score, role_missing_fields = _get_experience_role_rule_score(role)
+            description = role.get("description", "")
+            description_max = 0
+            if description and str(description).strip() and str(description).lower() not in EMPTY_DESCRIPTIONS:
+                description_max = EXPERIENCE_FIELDS["description"]["weight"]
+                llm_calls += 1
+            rule_scores.append(role_score)
+            max_scores.append(role_score + description_max)
+            if role_missing_fields:
+                review.append({
+                    "check_type": f"For role at {company_name}",
+                    "passed": False,
+                    "message": f"{', '.join(role_missing_fields)} {'is' if len(role_missing_fields) == 1 else 'are'} missing"
+                })
+
+    if not rule_scores:
+        return _rule_part(0, review, 0, 0)
+
+    return _rule_part(
+        round(sum(rule_scores) / len(rule_scores)),
+        review,
+        round(sum(max_scores) / len(max_scores)),
+        llm_calls
+    )
+
+
+def get_project_rule_part(data):
+    """
+    Title, date and media links of every project, the description adds at most 3 points
+    """
+    projects_list = data.get("projects", [])
+    rule_scores = []
+    max_scores = []
+    review = []
+    llm_calls = 0
+
+    for proj_index, project in enumerate(projects_list):
+        project_title = project.get("title", "")
+        project_identifier = project_title if project_title else f"project #{proj_index + 1}"
+        proj_score = 0
+        proj_missing_fields = []
+
+        if project_title and project_title.strip():
+            proj_score += 2
+        else:
+            proj_missing_fields.append("title")
+
+        project_date = project.get("date", "")
+        if project_date and project_date.strip():
+            proj_score += 2
+        else:
+            proj_missing_fields.append("date")
+
+        description = project.get("description", "")
+        description_max = 0
+        if description and description.strip():
+            description_max = 3
+            llm_calls += 1
+        else:
+            proj_missing_fields.append("description")
+
+        if any((project.get(link, "") or "").strip() for link in ["repo_link", "blog_link", "demo_link"]):
+            proj_score += 3
+        else:
+            proj_missing_fields.append("media")
+
+        if proj_missing_fields:
+            review.append({
+                "check_type": f"For {project_identifier}",
+                "passed": False,
+                "message": f"{', '.join(proj_missing_fields)} {'is' if len(proj_missing_fields) == 1 else 'are'} missing"
+            })
+        rule_scores.append(min(proj_score, 10))
+        max_scores.append(min(proj_score + description_max, 10))
+
+    if not rule_scores:
+        return _rule_part(0, review, 0, 0)
+
+    return _rule_part(
+        min(round(sum(rule_scores) / len(rule_scores), 1), 10),
+        review,
+        min(round(sum(max_scores) / len(max_scores), 1), 10),
+        llm_calls
+    )
+
+
+def get_skill_rule_part(data):
+    """
+    Skill count and endorsements are exact, relevance to the headline needs the LLM
+    """
+    skills_list = data.get("skills", [])
+    if not skills_list:
+        return _rule_part(0, [], 0, 0)
+
+    skill_score, review = _get_skill_rule_score(skills_list)
+    if not _get_skill_headline(data):
+        # Without a headline the scorer gives half of the relevance points and skips the LLM
+        exact_score = min(round(skill_score + SKILL_WEIGHTS["skill_relevance"] * 0.5, 1), 10)
+        return _rule_part(exact_score, review, exact_score, 0)
+
+    return _rule_part(
+        min(round(skill_score, 1), 10),
+        review,
+        min(round(skill_score + SKILL_WEIGHTS["skill_relevance"], 1), 10),
+        1
+    )
+
+
+def get_recommendation_rule_part(data):
+    """
+    The score only depends on the count, the LLM only writes suggestions when exactly one was received
+    """
+    received = data.get("recommendations", {}).get("received", [])
+    if len(received) >= 2:
+        return _rule_part(2, [], 2, 0)
+    elif len(received) == 1:
+        review = [{
+            "check_type": "Received Recommendations",
+            "passed": False,
+            "message": f"Received {len(received)} recommendation(s) and try to add more recommendations and ask peers for recommendations"
+        }]
+        return _rule_part(1, review, 1, 1)
+    return _rule_part(0, [{
+        "check_type": "Received Recommendations",
+        "passed": False,
+        "message": "Ask peers for recommendations"
+    }], 0, 0)
+
+
+RULE_PARTS = {
+    "headline": get_headline_rule_part,
+    "about": get_about_rule_part,
+    "experience": get_experience_rule_part,
+    "projects": get_project_rule_part,
+    "skills": get_skill_rule_part,
+    "recommendations": get_recommendation_rule_part,
+}
+
+
+async def get_rule_only_result(section_config, data, message):
+    """
+    Result of a section without waiting for the LLM.
+    Rule sections and LLM sections that would make no LLM call are scored for real,
+    otherwise the rule part is returned with a pending check carrying message.
+    """
+    rule_part_getter = RULE_PARTS.get(section_config["name"])
+    if rule_part_getter is None:
+        return await section_config["scorer"](data)
+
+    rule_part = rule_part_getter(data)
+    if rule_part["llm_calls"] == 0:
+        return await section_config["scorer"](data)
+
+    return {
+        "score": rule_part["score"],
+        "review": rule_part["review"] + [{
+            "check_type": "AI Analysis",
+            "passed": False,
+            "message": message
+        }],
+        "provisional": True
+    }